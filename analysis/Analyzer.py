@@ -1,13 +1,15 @@
-from analysis.Engine import Engine
+from analysis.BatchEngine import BatchEngine, group_params
 from model.Fitness import Fit
+from model.Results import Results, Writer
 from strategy.LiveParams import LiveParams
+from strategy.SignalCache import SignalCache
 from strategy.LiveStrategy import *
 from utils.metrics import *
 from utils.utils import *
 
 class Analyzer:
 
-    def __init__(self, id, data, emas, fractals, fitness, opt, analyzer_path):
+    def __init__(self, id, data, emas, fractals, fitness, opt, analyzer_path, pruning = None, screening = None):
 
         self.id = id
         self.data = data
@@ -16,6 +18,8 @@ class Analyzer:
         self.fitness = fitness
         self.opt = opt
         self.analyzer_path = analyzer_path
+        self.pruning = pruning
+        self.screening = screening
 
         # organize outputs
         self.path = analyzer_path + '/' + str(id) + '/'
@@ -34,35 +38,41 @@ class Analyzer:
         self.coolOffMinutes = self.opt.coolOffMinutes
         self.trendStartHour = self.opt.trendStartHour
         self.trendEndHour = self.opt.trendEndHour
+        self.fractalWidth = self.opt.fractalWidth
+
+        # share position-independent signals between engines
+        self.signals = SignalCache(data, emas, fractals)
+
+        # sweep engines compute only metrics of each fitness, full metrics for out-of-sample
+        self.metric_names = [ fit.value for fit in Fit if fit is not Fit.BLEND ] + [ 'params' ]
 
         # track in-sample sweep
-        self.engine_metrics = []
+        self.records = None
         self.metrics = []
         self.fittest = { }
 
-    def run(self):
-
-        id = 0
-        with tqdm(
-            disable = self.id != 0, # show only 1 core
-            total = self.opt.size,
-            colour = blue,
-            bar_format = '        In-sample:      {percentage:3.0f}%|{bar:80}{r_bar}') as pbar:
-
-            # sweep params from opt
-            for fastMinutes in self.fastMinutes:
-                for disableEntryMinutes in self.disableEntryMinutes:
-                    for fastMomentumMinutes in self.fastMomentumMinutes:
-                        for fastCrossoverPercent in self.fastCrossoverPercent:
-                            for takeProfitPercent in self.takeProfitPercent:
-                                for stopLossPercent in self.stopLossPercent:
-                                    for fastAngleEntryFactor in self.fastAngleEntryFactor:
-                                        for fastAngleExitFactor in self.fastAngleExitFactor:
-                                            for slowMinutes in self.slowMinutes:
-                                                for slowAngleFactor in self.slowAngleFactor:
-                                                    for coolOffMinutes in self.coolOffMinutes:
-                                                        for trendStartHour in self.trendStartHour:
-                                                            for trendEndHour in self.trendEndHour:
+        # early aborted engines
+        self.pruned_engines = 0
+        self.pruned_bars = 0
+
+    def run(self, batch_size = 100):
+
+        # sweep params from opt
+        sweep = []
+        for fastMinutes in self.fastMinutes:
+            for disableEntryMinutes in self.disableEntryMinutes:
+                for fastMomentumMinutes in self.fastMomentumMinutes:
+                    for fastCrossoverPercent in self.fastCrossoverPercent:
+                        for takeProfitPercent in self.takeProfitPercent:
+                            for stopLossPercent in self.stopLossPercent:
+                                for fastAngleEntryFactor in self.fastAngleEntryFactor:
+                                    for fastAngleExitFactor in self.fastAngleExitFactor:
+                                        for slowMinutes in self.slowMinutes:
+                                            for slowAngleFactor in self.slowAngleFactor:
+                                                for coolOffMinutes in self.coolOffMinutes:
+                                                    for trendStartHour in self.trendStartHour:
+                                                        for trendEndHour in self.trendEndHour:
+                                                            for fractalWidth in self.fractalWidth:
 
                                                                 # update params
                                                                 params = LiveParams(
@@ -78,38 +88,57 @@ class Analyzer:
                                                                     slowAngleFactor = slowAngleFactor,
                                                                     coolOffMinutes = coolOffMinutes,
                                                                     trendStartHour = trendStartHour,
-                                                                    trendEndHour = trendEndHour)
+                                                                    trendEndHour = trendEndHour,
+                                                                    fractalWidth = fractalWidth)
 
-                                                                # init strategy and engine
-                                                                strategy = LiveStrategy(self.data, self.emas, self.fractals, params)
-                                                                engine = Engine(id, strategy)
+                                                                sweep.append(params)
 
-                                                                # run and save
-                                                                engine.run(disable = self.id != 0)
-                                                                engine.save(self.path, False)
+        # save from background thread, all written on exit
+        with Writer(self.path) as writer, tqdm(
+            disable = self.id != 0, # show only 1 core
+            total = self.opt.size,
+            colour = blue,
+            bar_format = '        In-sample:      {percentage:3.0f}%|{bar:80}{r_bar}') as pbar:
 
-                                                                id += 1
-                                                                pbar.update()
+            # screen on coarse bars, only survivors run on 1 minute bars
+            ids = range(len(sweep))
+            if self.screening is not None:
+                ids, sweep, pruned = self.screening.screen(ids, sweep, self.fitness, self.data.index, batch_size)
+                writer.append(pruned)
+                pbar.update(self.opt.size - len(ids))
+
+            # step params sharing ema columns together
+            for batch_ids, batch_params in group_params(ids, sweep, batch_size):
+
+                # init strategies and batch engine
+                strategies = [ LiveStrategy(self.data, self.emas, self.fractals, params, self.signals) for params in batch_params ]
+                batch = BatchEngine(batch_ids, strategies)
+
+                # run and save
+                batch.run(
+                    disable = self.id != 0,
+                    pruning = self.pruning,
+                    metric_names = self.metric_names,
+                    isSeries = False)
+                writer.append(batch.engines)
+                pbar.update(len(batch_ids))
 
         pbar.close()
         self.analyze()
 
     def analyze(self):
 
-        # get num of files in dir
-        num_engines = len(os.listdir(self.path))
-        ids = np.arange(0, num_engines, 1)
-
-        # collect engine metrics
-        for id in ids:
-
-            engine_metrics = unpack(id, self.path)['metrics']
+        # numeric metrics of all engines, one row each
+        records = Results(self.path).records()
 
-            # filter out engines with loss
-            profit = next(metric.value for metric in engine_metrics if metric.name == 'profit')
-            if 0 > profit: continue
+        # filter out pruned engines, partial result
+        pruned_bars = records.column('pruned_bars')
+        isPruned = ~np.isnan(pruned_bars)
+        self.pruned_engines += int(isPruned.sum())
+        self.pruned_bars += int(pruned_bars[isPruned].sum())
 
-            self.engine_metrics.extend(engine_metrics)
+        # filter out engines with loss
+        self.records = records.take(~isPruned & ~(0 > records.column('profit')))
 
         # init analyzer metrics
         self.metrics = get_analyzer_metrics(self)
@@ -119,13 +148,13 @@ class Analyzer:
 
             # skip adding to analyzer metrics if not profitable
             # todo entire IS unprofitable -> exit()
-            if len(self.engine_metrics) == 0:
+            if len(self.records) == 0:
                 continue
 
             # get fittest blend
             if fitness is Fit.BLEND:
-                fitnesses = self.fitness.blend(self.engine_metrics)
-                metric = max(fitnesses, key = lambda metric: metric.value)
+                scores, best = self.fitness.blend({ name: self.records.column(name) for name in self.fitness.names })
+                metric = self.fitness.metric(int(self.records.ids[best]), scores[best].item())
 
             # get standard fitness
             else:
@@ -137,23 +166,19 @@ class Analyzer:
     def get_fittest_metric(self, fitness):
 
         # isolate fitness metrics
-        fitness_metrics = []
-        for metric in self.engine_metrics:
-            if metric.name == fitness.value:
-                fitness_metrics.append(metric)
+        values = self.records.column(fitness.value)
+        isPresent = ~np.isnan(values)
 
         # catch no profitable engines for this fitness
-        if len(fitness_metrics) == 0:
+        if not isPresent.any():
             return None
 
-        # sort by value
-        fitness_metrics = sorted(
-            fitness_metrics,
-            key = lambda it: it.value,
-            reverse = True)
+        # largest value, first engine on ties
+        rows = np.flatnonzero(isPresent)
+        id = self.records.ids[rows[np.argmax(values[rows])]]
 
         # tag title
-        metric = fitness_metrics[0]
+        metric = self.records.metric(id, fitness.value)
         metric.title = f'[{metric.id}] {metric.title}'
         return metric
 
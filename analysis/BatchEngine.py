@@ -0,0 +1,281 @@
+from analysis.Engine import Engine
+from utils.metrics import get_batch_engine_metrics
+from utils.utils import *
+
+def group_params(ids, params, batch_size):
+
+    # group params sharing ema columns
+    groups = { }
+    for id, individual in zip(ids, params):
+        key = (individual.fastMinutes, individual.slowMinutes)
+        groups.setdefault(key, []).append((id, individual))
+
+    # split groups into batches
+    batches = []
+    for members in groups.values():
+        for start in range(0, len(members), batch_size):
+            batch = members[start : start + batch_size]
+            batches.append(([ id for id, _ in batch ], [ individual for _, individual in batch ]))
+
+    return batches
+
+class BatchEngine:
+
+    def __init__(self, ids, strategies):
+
+        # strategies must share ema columns to step together
+        fastMinutes = { strategy.fastMinutes for strategy in strategies }
+        slowMinutes = { strategy.slowMinutes for strategy in strategies }
+        if len(fastMinutes) != 1 or len(slowMinutes) != 1:
+            raise ValueError('BatchEngine requires equal fastMinutes and slowMinutes')
+
+        self.ids = ids
+        self.strategies = strategies
+        self.engines = [ Engine(id, strategy) for id, strategy in zip(ids, strategies) ]
+
+        # shared columns, identical for all strategies
+        self.data = strategies[0].data
+        self.reference = strategies[0]
+
+        # params, length n
+        self.coolOffMinutes = self.params('coolOffMinutes')
+        self.takeProfit = self.params('takeProfit')
+        self.stopLoss = self.params('stopLoss')
+        self.fastCrossover = self.params('fastCrossover')
+
+        # strategy state, length n
+        n = len(strategies)
+        self.position = np.zeros(n, dtype = int)
+        self.longExitBarIndex = np.full(n, -1)
+        self.shortExitBarIndex = np.full(n, -1)
+        self.longFastCrossoverExit = np.full(n, np.nan)
+        self.shortFastCrossoverExit = np.full(n, np.nan)
+        self.isExitLongCrossoverEnabled = np.zeros(n, dtype = bool)
+        self.isExitShortCrossoverEnabled = np.zeros(n, dtype = bool)
+        self.longTakeProfit = np.full(n, np.nan)
+        self.shortTakeProfit = np.full(n, np.nan)
+        self.longStopLoss = np.full(n, np.nan)
+        self.shortStopLoss = np.full(n, np.nan)
+
+        # cash balance after each fill, per engine
+        self.fill_bars = [ [] for _ in range(n) ]
+        self.fill_cash = [ [] for _ in range(n) ]
+
+        # engines not pruned
+        self.active = np.ones(n, dtype = bool)
+        self.pruning = None
+
+    def params(self, name):
+        return np.array([ getattr(strategy, name) for strategy in self.strategies ])
+
+    def run(self, position = 1, disable = True, bar_format = None, chunk_size = 4096, pruning = None, metric_names = None, isSeries = True):
+
+        self.pruning = pruning
+        strategy = self.reference
+        index = self.data.index
+
+        # shared per-bar conditions, independent of params
+        isFastAboveSlow = (strategy.fast > strategy.slow).tolist()
+        isSlowAboveFast = (strategy.slow > strategy.fast).tolist()
+        isFastAboveLow = (strategy.fast > strategy.lows).tolist()
+        isHighAboveFast = (strategy.highs > strategy.fast).tolist()
+        highs = strategy.highs.tolist()
+        lows = strategy.lows.tolist()
+
+        if bar_format is None: bar_format = '                        {percentage:3.0f}%|{bar:80}{r_bar}'
+        for bar_index, idx in enumerate(tqdm(
+            position = position,
+            disable = disable,
+            leave = False,
+            iterable = index,
+            colour = aqua,
+            bar_format = bar_format)):
+
+            # position-independent signals of all strategies, for a chunk of bars
+            row = bar_index % chunk_size
+            if row == 0: signals = self.get_signals(bar_index, bar_index + chunk_size)
+
+            is_last_bar = bar_index == strategy.last_bar_index
+            high = highs[bar_index]
+            low = lows[bar_index]
+
+            # position
+            is_long = self.position > 0
+            is_short = 0 > self.position
+
+            # entry signals after cooloff
+            isEntryLongSignal = signals['longSignals'][row] & (bar_index - self.longExitBarIndex > self.coolOffMinutes)
+            isEntryShortSignal = signals['shortSignals'][row] & (bar_index - self.shortExitBarIndex > self.coolOffMinutes)
+
+            # exit, fast momentum and rapid momentum swing
+            isExitLongFastMomentum = signals['longFastMomentums'][row] & is_long
+            isExitShortFastMomentum = signals['shortFastMomentums'][row] & is_short
+            isExitLongRapidMomentum = signals['longRapidMomentums'][row] & is_long
+            isExitShortRapidMomentum = signals['shortRapidMomentums'][row] & is_short
+
+            # entry, long
+            isEntryLong = ~is_long & isEntryLongSignal
+            if isFastAboveSlow[bar_index]:
+                isEntryLong |= isExitShortFastMomentum
+                if not is_last_bar: isEntryLong |= isExitShortRapidMomentum
+
+            # entry, short
+            isEntryShort = ~is_short & isEntryShortSignal
+            if isSlowAboveFast[bar_index]:
+                isEntryShort |= isExitLongFastMomentum
+                if not is_last_bar: isEntryShort |= isExitLongRapidMomentum
+
+            # exit, fast crossover after hitting threshold
+            self.isExitLongCrossoverEnabled |= high > self.longFastCrossoverExit
+            self.isExitShortCrossoverEnabled |= self.shortFastCrossoverExit > low
+            if isFastAboveLow[bar_index]: isExitLongFastCrossover = self.isExitLongCrossoverEnabled
+            else: isExitLongFastCrossover = np.zeros_like(is_long)
+            if isHighAboveFast[bar_index]: isExitShortFastCrossover = self.isExitShortCrossoverEnabled
+            else: isExitShortFastCrossover = np.zeros_like(is_short)
+
+            # exit, take profit and stop loss, levels fixed at entry
+            isExitLongTakeProfit = high > self.longTakeProfit
+            isExitShortTakeProfit = self.shortTakeProfit > low
+            isExitLongStopLoss = self.longStopLoss > low
+            isExitShortStopLoss = high > self.shortStopLoss
+
+            # flip trade immediately in opposite direction
+            isExitLongFlip = is_long & isEntryShortSignal
+            if isSlowAboveFast[bar_index]: isExitLongFlip |= isExitLongFastMomentum | isExitLongRapidMomentum
+            isExitShortFlip = is_short & isEntryLongSignal
+            if isFastAboveSlow[bar_index]: isExitShortFlip |= isExitShortFastMomentum | isExitShortRapidMomentum
+
+            # exit long and short
+            if is_last_bar:
+                isExitLong = is_long
+                isExitShort = is_short
+            else:
+                isExitLong = is_long & (
+                    isExitLongFastCrossover
+                    | isExitLongFastMomentum
+                    | isExitLongTakeProfit
+                    | isExitLongStopLoss
+                    | isExitLongFlip
+                    | isExitLongRapidMomentum)
+                isExitShort = is_short & (
+                    isExitShortFastCrossover
+                    | isExitShortFastMomentum
+                    | isExitShortTakeProfit
+                    | isExitShortStopLoss
+                    | isExitShortFlip
+                    | isExitShortRapidMomentum)
+
+            # nothing to do for any strategy, most bars
+            orders = (isEntryLong | isEntryShort | isExitLong | isExitShort) & self.active
+            isCheckpoint = pruning is not None and pruning.is_checkpoint(bar_index)
+            if not orders.any() and not isCheckpoint: continue
+
+            for i in np.flatnonzero(orders):
+
+                # exit comments, in order of precedence
+                longExitComment, shortExitComment = None, None
+                if isExitLong[i]:
+                    if isExitLongFastCrossover[i]: longExitComment = 'fastCrossover'
+                    elif isExitLongTakeProfit[i]: longExitComment = 'takeProfit'
+                    elif is_last_bar: longExitComment = 'lastBar'
+                    elif isExitLongFastMomentum[i] and isSlowAboveFast[bar_index]: longExitComment = 'flip fastMomentum'
+                    elif isEntryShortSignal[i]: longExitComment = 'flip shortSignal'
+                    elif isExitLongRapidMomentum[i] and isSlowAboveFast[bar_index]: longExitComment = 'flip rapidMomentum'
+                    elif isExitLongFastMomentum[i]: longExitComment = 'fastMomentum'
+                    elif isExitLongStopLoss[i]: longExitComment = 'stopLoss'
+                    elif isExitLongRapidMomentum[i]: longExitComment = 'rapidMomentum'
+
+                if isExitShort[i]:
+                    if isExitShortFastCrossover[i]: shortExitComment = 'fastCrossover'
+                    elif isExitShortTakeProfit[i]: shortExitComment = 'takeProfit'
+                    elif is_last_bar: shortExitComment = 'lastBar'
+                    elif isExitShortFastMomentum[i] and isFastAboveSlow[bar_index]: shortExitComment = 'flip fastMomentum'
+                    elif isEntryLongSignal[i]: shortExitComment = 'flip longSignal'
+                    elif isExitShortRapidMomentum[i] and isFastAboveSlow[bar_index]: shortExitComment = 'flip rapidMomentum'
+                    elif isExitShortFastMomentum[i]: shortExitComment = 'fastMomentum'
+                    elif isExitShortStopLoss[i]: shortExitComment = 'stopLoss'
+                    elif isExitShortRapidMomentum[i]: shortExitComment = 'rapidMomentum'
+
+                self.fill_orders(i, bar_index, idx, isEntryLong[i], isEntryShort[i], longExitComment, shortExitComment)
+
+            # prune hopeless engines at checkpoints
+            if isCheckpoint:
+                for i in np.flatnonzero(self.active):
+                    if self.engines[i].prune(bar_index, pruning): self.active[i] = False
+
+            # all engines pruned
+            if not self.active.any(): break
+
+        # rebuild equity, or running equity only
+        for engine, fill_bars, fill_cash in zip(self.engines, self.fill_bars, self.fill_cash):
+            if isSeries: engine.fill_cash_series(fill_bars, fill_cash)
+            else: engine.fill_equity(fill_bars, fill_cash)
+
+        # analyze results of all engines together
+        for engine, metrics in zip(self.engines, get_batch_engine_metrics(self.engines, metric_names)):
+            engine.analyze(metric_names, metrics)
+
+    def get_signals(self, start, end):
+
+        # stack cached signals of each strategy, bars by strategies
+        window = slice(start, end)
+        names = [
+            'longSignals',
+            'shortSignals',
+            'longFastMomentums',
+            'shortFastMomentums',
+            'longRapidMomentums',
+            'shortRapidMomentums']
+
+        return { name: np.column_stack([ getattr(strategy, name)[window] for strategy in self.strategies ]) for name in names }
+
+    def fill_orders(self, i, bar_index, idx, isEntryLong, isEntryShort, longExitComment, shortExitComment):
+
+        engine = self.engines[i]
+        strategy = self.strategies[i]
+        ticker = strategy.ticker
+        size = strategy.size
+        close = strategy.closes[bar_index]
+
+        # set index
+        strategy.bar_index = bar_index
+        strategy.current_idx = idx
+
+        # entry long, fix exit levels
+        if isEntryLong:
+            strategy.buy(ticker, size)
+            self.position[i] += size
+            if self.fastCrossover[i] != 0: self.longFastCrossoverExit[i] = (1 + self.fastCrossover[i]) * close
+            if self.takeProfit[i] != 0: self.longTakeProfit[i] = (1 + self.takeProfit[i]) * close
+            if self.stopLoss[i] != 0: self.longStopLoss[i] = (1 - self.stopLoss[i]) * close
+            self.isExitLongCrossoverEnabled[i] = False
+
+        # entry short, fix exit levels
+        if isEntryShort:
+            strategy.sell(ticker, size)
+            self.position[i] -= size
+            if self.fastCrossover[i] != 0: self.shortFastCrossoverExit[i] = (1 - self.fastCrossover[i]) * close
+            if self.takeProfit[i] != 0: self.shortTakeProfit[i] = (1 - self.takeProfit[i]) * close
+            if self.stopLoss[i] != 0: self.shortStopLoss[i] = (1 + self.stopLoss[i]) * close
+            self.isExitShortCrossoverEnabled[i] = False
+
+        # exit long
+        if longExitComment is not None:
+            strategy.sell(ticker, size, longExitComment)
+            self.position[i] -= size
+            self.longExitBarIndex[i] = bar_index
+
+        # exit short
+        if shortExitComment is not None:
+            strategy.buy(ticker, size, shortExitComment)
+            self.position[i] += size
+            self.shortExitBarIndex[i] = bar_index
+
+        # fill and track cash balance
+        engine.fill_orders()
+        self.fill_bars[i].append(bar_index)
+        self.fill_cash[i].append(engine.cash)
+
+        # stop hopeless engine, cash constant after
+        if self.pruning is not None and engine.prune(bar_index, self.pruning):
+            self.active[i] = False
@@ -1,4 +1,8 @@
-from model.Trade import Trade
+import copy
+
+from model.Equity import Equity
+from model.Ledger import Ledger
+from model.Results import Results
 from utils.metrics import *
 from utils.utils import *
 
@@ -11,105 +15,207 @@ class Engine:
 
         self.data = strategy.data
         self.current_idx = -1
-        self.trades = []
+        self.ledger = Ledger(strategy.ticker)
         self.metrics = []
-        self.cash_series = pd.Series(index = self.data.index)
+        self.cash_series = None # cash of each bar, if kept
+        self.equity = None # running equity otherwise
         self.initial_cash = initial_cash
         self.cash = self.initial_cash
 
-    def run(self, position = 1, disable = True, bar_format = None):
+        # equity before resumed bar, cash changes restored from snapshot
+        self.start_cash = self.initial_cash
+        self.history_bars = []
+        self.history_cash = []
+
+        # early abort, bar of partial result
+        self.peak_cash = self.initial_cash
+        self.pruned_bar = None
+
+    def run(self, position = 1, disable = True, bar_format = None, pruning = None, stop = None, metric_names = None, isSeries = True):
+
+        # preallocate equity indexed by bar position, or keep running equity only
+        index = self.data.index
+        cash_series = np.empty(len(index)) if isSeries else None
+        strategy = self.strategy
+
+        # resume after restored bar, end before stop bar
+        start = strategy.bar_index + 1
+        if stop is None: stop = len(index)
+        if not isSeries: self.fill_equity([], [], start)
+        elif start > 0:
+            self.fill_cash_series([], [])
+            cash_series[:start] = self.cash_series.to_numpy()[:start]
 
         if bar_format is None: bar_format = '                        {percentage:3.0f}%|{bar:80}{r_bar}'
-        for idx in tqdm(
+        for bar_index, idx in enumerate(tqdm(
             position = position,
             disable = disable,
             leave = False,
-            iterable = self.data.index,
+            iterable = index[start : stop],
             colour = aqua,
-            bar_format = bar_format):
+            bar_format = bar_format), start):
 
             # set index
             self.current_idx = idx
-            self.strategy.current_idx = self.current_idx
+            strategy.current_idx = idx
 
             # execute strat
-            self.strategy.on_bar()
+            strategy.on_bar()
 
             # fill orders, if needed
-            orders = self.strategy.orders
-            if len(orders) > 0 and orders[-1].idx == self.current_idx:
+            orders = strategy.orders
+            if len(orders) > 0 and orders[-1].bar_index == bar_index:
                 self.fill_orders()
 
             # track cash balance
-            self.cash_series[idx] = self.cash
+            if isSeries: cash_series[bar_index] = self.cash
+            else: self.equity.extend(self.cash)
+
+            # stop hopeless run, cash constant after
+            if pruning is not None and self.prune(bar_index, pruning):
+                if isSeries: cash_series[bar_index + 1:] = self.cash
+                break
+
+        # cash constant after stop
+        if not isSeries: self.equity.extend(self.cash, len(index) - self.equity.bars)
+        else:
+            cash_series[stop:] = self.cash
+
+            # wrap equity with timestamps
+            self.cash_series = pd.Series(cash_series, index = index)
 
         # analyze results
-        self.analyze()
+        self.analyze(metric_names)
 
     def fill_orders(self):
 
         # consider last order and trade
         order = self.strategy.orders[-1]
-        if len(self.trades) == 0: trade = None
-        else: trade = self.trades[-1]
+        ledger = self.ledger
 
         # enter new trade
-        if trade is None or trade.is_closed:
-            self.trades.append(
-                Trade(
-                    id = len(self.trades) + 1,
-                    side = order.sentiment,
-                    size = order.size,
-                    entry_order = order,
-                    exit_order = None))
+        if not ledger.is_open:
+            ledger.open(order.bar_index, order.price, order.size)
             return
 
         # close open trade
-        trade.exit_order = order
-        self.cash += trade.profit
+        self.cash += ledger.close(order.bar_index, order.price, order.comment)
 
         # flip, enter new trade immediately on exit
         if 'flip' in order.comment:
             entry_order = self.strategy.orders[-2]
-            self.trades.append(
-                Trade(
-                    id = len(self.trades) + 1,
-                    side = entry_order.sentiment,
-                    size = entry_order.size,
-                    entry_order = entry_order,
-                    exit_order = None))
+            ledger.open(entry_order.bar_index, entry_order.price, entry_order.size)
 
-    def analyze(self):
+    def prune(self, bar_index, pruning):
 
-        # build metrics
-        self.metrics = get_engine_metrics(self)
+        # track peak for drawdown
+        self.peak_cash = max(self.peak_cash, self.cash)
 
-        # tag all metrics with engine id
-        for metric in self.metrics: metric.id = self.id
+        # mark partial result
+        if pruning.is_exceeded(self.cash, self.peak_cash, len(self.ledger)) or (
+            pruning.is_checkpoint(bar_index) and pruning.is_below(self.cash)):
+            self.pruned_bar = bar_index
 
-    ''' serialize '''
-    def save(self, path, isFull):
+        return self.pruned_bar is not None
 
-        # out-of-sample
-        if isFull: bundle = {
-            'id': self.id,
-            'params': self.strategy.params,
-            'metrics': self.metrics,
-            'trades': self.trades,
-            'cash_series': self.cash_series
-        }
+    @property
+    def pruned_bars(self):
+
+        # bars skipped by early abort
+        if self.pruned_bar is None: return 0
+        return len(self.data.index) - 1 - self.pruned_bar
+
+    @property
+    def trades(self):
+
+        # trade views of ledger, for display
+        return self.ledger.trades(self.data.index)
+
+    def fill_cash_series(self, fill_bars, fill_cash):
+
+        # cash balance is constant between fills, expand by segment
+        index = self.data.index
+        bars = np.concatenate(([0], self.history_bars, fill_bars)).astype(int)
+        cash = np.concatenate(([self.start_cash], self.history_cash, fill_cash))
+        segments = np.searchsorted(bars, np.arange(len(index)), side = 'right') - 1
+
+        self.cash_series = pd.Series(cash[segments].astype(float), index = index)
 
-        # in-sample
-        else: bundle = {
+    def fill_equity(self, fill_bars, fill_cash, end = None):
+
+        # running equity through end bar, cash series not kept
+        if end is None: end = len(self.data.index)
+        bars = np.concatenate(([0], self.history_bars, fill_bars, [end])).astype(int)
+        cash = np.concatenate(([self.start_cash], self.history_cash, fill_cash)).astype(float)
+
+        # later fill on same bar wins
+        bars = np.minimum(bars, end)
+        self.cash_series = None
+        self.equity = Equity(self.initial_cash)
+        for balance, length in zip(cash.tolist(), np.diff(bars).tolist()):
+            if length > 0: self.equity.extend(balance, length)
+
+    def snapshot(self):
+
+        # full state after last processed bar
+        bar_index = self.strategy.bar_index
+
+        # equity so far, as bars where cash changes
+        equity = self.cash_series.to_numpy()[:bar_index + 1]
+        bars = np.concatenate(([0], np.flatnonzero(np.diff(equity)) + 1))
+
+        return {
             'id': self.id,
-            'params': self.strategy.params,
-            'metrics': self.metrics
+            'idx': self.data.index[bar_index],
+            'bar_index': bar_index,
+            'cash': self.cash,
+            'peak_cash': self.peak_cash,
+            'equity': (bars, equity[bars]),
+            'ledger': copy.deepcopy(self.ledger),
+            'strategy': self.strategy.snapshot()
         }
 
-        save(
-            bundle = bundle,
-            filename = str(self.id),
-            path = path)
+    def restore(self, snapshot, isCarryCash = True):
+
+        # resume on first bar after snapshot, bar positions shift with the data window
+        start = self.data.index.searchsorted(snapshot['idx'], side = 'right')
+        shift = start - (snapshot['bar_index'] + 1)
+        self.strategy.restore(snapshot['strategy'], start - 1, shift)
+
+        # carry cash, equity and trade history, or only the open trade
+        if isCarryCash:
+            self.cash = snapshot['cash']
+            self.peak_cash = snapshot['peak_cash']
+
+            # equity before resumed bar, bars before this data collapse into first bar
+            bars, cash = snapshot['equity']
+            bars = bars + shift
+            first = max(np.searchsorted(bars, 0, side = 'right') - 1, 0)
+            self.start_cash = cash[first]
+            self.history_bars = bars[bars > 0]
+            self.history_cash = cash[bars > 0]
+
+        self.ledger = snapshot['ledger'].rebase(shift, isOpenOnly = not isCarryCash)
+
+    def analyze(self, metric_names = None, metrics = None):
+
+        # build metrics, all if names not given, unless built with the batch
+        if metrics is None: metrics = get_engine_metrics(self, metric_names)
+        self.metrics = metrics
+
+        # flag partial result for selection
+        if self.pruned_bar is not None:
+            self.metrics.append(
+                Metric('pruned_bars', self.pruned_bars, None, 'Pruned bars'))
+
+        # tag all metrics with engine id
+        for metric in self.metrics: metric.id = self.id
+
+    ''' serialize '''
+    def save(self, path, isFull):
+
+        # params and metrics, trades and equity if full (out-of-sample)
+        Results(path).append([ self ], isFull)
 
     ####################################################################################################################
 
@@ -122,15 +228,15 @@ class Engine:
         show_last = 1000
         ################
 
-        trades = self.trades
+        trades = self.trades[-show_last:]
 
         # header
         print('\nTrades:')
         print('\t\t\t\t\tclose\tprofit\tcomment')
-        if len(trades) > show_last: print('\t...')
+        if len(self.ledger) > show_last: print('\t...')
 
         # trades
-        for trade in trades[-show_last:]: print(trade)
+        for trade in trades: print(trade)
         print()
 
     def plot_trades(self, shouldShow = False):
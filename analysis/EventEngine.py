@@ -0,0 +1,170 @@
+import math
+
+from analysis.Engine import Engine
+from utils.utils import *
+
+class EventEngine(Engine):
+
+    # runs LiveStrategy.on_bar only on bars where an order is possible,
+    # jumping over bars where nothing can happen
+
+    def run(self, position = 1, disable = True, bar_format = None, stop = None):
+
+        strategy = self.strategy
+        index = self.data.index
+
+        # resume after restored bar, end before stop bar
+        start = strategy.bar_index + 1
+        if stop is None: self.end = strategy.last_bar_index
+        else: self.end = stop - 1
+
+        # candidate event bars, from vectorized signals
+        self.longSignalBars = np.flatnonzero(strategy.longSignals)
+        self.shortSignalBars = np.flatnonzero(strategy.shortSignals)
+        self.longFastMomentumBars = np.flatnonzero(strategy.longFastMomentums)
+        self.shortFastMomentumBars = np.flatnonzero(strategy.shortFastMomentums)
+        self.longRapidMomentumBars = np.flatnonzero(strategy.longRapidMomentums)
+        self.shortRapidMomentumBars = np.flatnonzero(strategy.shortRapidMomentums)
+        self.fastAboveLowBars = np.flatnonzero(strategy.fast > strategy.lows)
+        self.highAboveFastBars = np.flatnonzero(strategy.highs > strategy.fast)
+
+        # cash balance after each fill
+        fill_bars = []
+        fill_cash = []
+
+        if bar_format is None: bar_format = '                        {percentage:3.0f}%|{bar:80}{r_bar}'
+        with tqdm(
+            position = position,
+            disable = disable,
+            leave = False,
+            total = len(index),
+            colour = aqua,
+            bar_format = bar_format) as pbar:
+
+            pbar.update(start)
+            bar_index = start
+            while self.end >= bar_index:
+
+                # jump to next bar where an order is possible
+                event_index = self.next_event(bar_index)
+                if event_index > self.end: break
+
+                # set index
+                idx = index[event_index]
+                self.current_idx = idx
+                strategy.current_idx = idx
+                strategy.bar_index = event_index - 1
+
+                # execute strat
+                strategy.on_bar()
+
+                # fill orders, if needed
+                orders = strategy.orders
+                if len(orders) > 0 and orders[-1].bar_index == event_index:
+                    self.fill_orders()
+                    fill_bars.append(event_index)
+                    fill_cash.append(self.cash)
+
+                pbar.update(event_index + 1 - bar_index)
+                bar_index = event_index + 1
+
+        # state as of end bar, for snapshot
+        strategy.bar_index = self.end
+        self.current_idx = index[self.end]
+        strategy.current_idx = self.current_idx
+
+        # equity is constant between fills
+        self.fill_cash_series(fill_bars, fill_cash)
+
+        # analyze results
+        self.analyze()
+
+    def next_event(self, start):
+
+        strategy = self.strategy
+        last_bar_index = strategy.last_bar_index
+
+        # flat, wait for entry signal after cooloff
+        if strategy.is_flat:
+            long_entry = next_bar(self.longSignalBars, max(start, cooloff_bar(strategy.longExitBarIndex, strategy.coolOffMinutes)))
+            short_entry = next_bar(self.shortSignalBars, max(start, cooloff_bar(strategy.shortExitBarIndex, strategy.coolOffMinutes)))
+            return min(long_entry, short_entry)
+
+        highs = strategy.highs
+        lows = strategy.lows
+
+        # long, exit on momentum, flip or last bar
+        if strategy.is_long:
+
+            stop = min(
+                last_bar_index,
+                next_bar(self.longFastMomentumBars, start),
+                next_bar(self.longRapidMomentumBars, start),
+                next_bar(self.shortSignalBars, max(start, cooloff_bar(strategy.shortExitBarIndex, strategy.coolOffMinutes))))
+
+            # forward scan levels fixed at entry
+            takeProfit = strategy.longTakeProfit
+            stopLoss = strategy.longStopLoss
+            if not np.isnan(takeProfit): stop = scan(lambda a, b: highs[a:b] > takeProfit, start, stop)
+            if not np.isnan(stopLoss): stop = scan(lambda a, b: stopLoss > lows[a:b], start, stop)
+
+            # fast crossover exit, once enabled by threshold
+            if strategy.fastCrossover != 0:
+                crossoverExit = strategy.longFastCrossoverExit
+                if strategy.isExitLongCrossoverEnabled: enabled = start
+                else: enabled = scan(lambda a, b: highs[a:b] > crossoverExit, start, stop)
+                stop = min(stop, next_bar(self.fastAboveLowBars, enabled))
+
+                # carry threshold over skipped bars, up to end bar
+                if min(stop, self.end + 1) > enabled: strategy.isExitLongCrossoverEnabled = True
+
+            return stop
+
+        # short, exit on momentum, flip or last bar
+        stop = min(
+            last_bar_index,
+            next_bar(self.shortFastMomentumBars, start),
+            next_bar(self.shortRapidMomentumBars, start),
+            next_bar(self.longSignalBars, max(start, cooloff_bar(strategy.longExitBarIndex, strategy.coolOffMinutes))))
+
+        # forward scan levels fixed at entry
+        takeProfit = strategy.shortTakeProfit
+        stopLoss = strategy.shortStopLoss
+        if not np.isnan(takeProfit): stop = scan(lambda a, b: takeProfit > lows[a:b], start, stop)
+        if not np.isnan(stopLoss): stop = scan(lambda a, b: highs[a:b] > stopLoss, start, stop)
+
+        # fast crossover exit, once enabled by threshold
+        if strategy.fastCrossover != 0:
+            crossoverExit = strategy.shortFastCrossoverExit
+            if strategy.isExitShortCrossoverEnabled: enabled = start
+            else: enabled = scan(lambda a, b: crossoverExit > lows[a:b], start, stop)
+            stop = min(stop, next_bar(self.highAboveFastBars, enabled))
+
+            # carry threshold over skipped bars, up to end bar
+            if min(stop, self.end + 1) > enabled: strategy.isExitShortCrossoverEnabled = True
+
+        return stop
+
+def next_bar(bars, start):
+
+    # first candidate bar at or after start, past the end if none
+    i = np.searchsorted(bars, start)
+    if i == len(bars): return math.inf
+    return int(bars[i])
+
+def cooloff_bar(exit_bar_index, coolOffMinutes):
+
+    # first bar with elapsed entry delay after exit
+    return math.floor(exit_bar_index + coolOffMinutes) + 1
+
+def scan(condition, start, stop, window = 64):
+
+    # first bar in [start, stop) where condition holds, stop if none
+    # windows grow geometrically so work is bounded by distance to the hit
+    while stop > start:
+        end = min(start + window, stop)
+        hits = np.flatnonzero(condition(start, end))
+        if len(hits) > 0: return start + int(hits[0])
+        start, window = end, window * 2
+
+    return stop
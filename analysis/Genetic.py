@@ -1,9 +1,14 @@
 import copy
 import random
 
+from analysis.BatchEngine import BatchEngine, group_params
 from analysis.Engine import Engine
+from model.Metric import Metric
+from model.Records import Records
+from model.Results import Results, Writer
 from strategy.LiveParams import LiveParams
 from strategy.LiveStrategy import LiveStrategy
+from strategy.SignalCache import SignalCache
 from utils.metrics import init_genetic_metrics, get_genetic_results_metrics, print_metrics
 from utils.utils import *
 
@@ -20,7 +25,10 @@ class Genetic:
         fractals,
         opt,
         parent_path,
-        cores):
+        cores,
+        pruning = None,
+        screening = None,
+        isSaveGenerations = False):
 
         self.population_size = population_size
         self.generations = generations
@@ -32,6 +40,9 @@ class Genetic:
         self.opt = opt
         self.parent_path = parent_path
         self.cores = cores
+        self.pruning = pruning
+        self.screening = screening
+        self.isSaveGenerations = isSaveGenerations # engines of each generation to disk, not needed for selection
 
         # organize outputs
         self.generations_path = parent_path + '/generations'
@@ -52,12 +63,21 @@ class Genetic:
         self.coolOffMinutes = self.opt.coolOffMinutes
         self.trendStartHour = self.opt.trendStartHour
         self.trendEndHour = self.opt.trendEndHour
+        self.fractalWidth = self.opt.fractalWidth
+
+        # share position-independent signals between engines
+        self.signals = SignalCache(data, emas, fractals)
+
+        # population computes only metrics for blend, profit filter and progress, full metrics for best engines
+        self.metric_names = fitness.names + [ 'profit', 'profit_factor', 'num_trades', 'params' ]
 
         # track population through generations
         self.population = []
-        self.engine_metrics = []
         self.best_engines = []
+        self.best_metrics = []
         self.unprofitable_engines = []
+        self.pruned_engines = []
+        self.pruned_bars = 0
         self.params = []
 
         # init first population
@@ -78,6 +98,7 @@ class Genetic:
                 coolOffMinutes = random.choice(self.coolOffMinutes),
                 trendStartHour = random.choice(self.trendStartHour),
                 trendEndHour = random.choice(self.trendEndHour),
+                fractalWidth = random.choice(self.fractalWidth),
             )
 
             self.population.append(individual)
@@ -89,6 +110,7 @@ class Genetic:
 
         # organize outputs
         path = self.generations_path + '/' + str(generation)
+        hits, misses = self.signals.hits, self.signals.misses
 
         # segregate population into groups for each core process
         group_size = int(self.population_size / self.cores)
@@ -96,6 +118,9 @@ class Genetic:
         end = int(start + group_size)
         group = self.population[start : end]
 
+        # save from background thread, if needed
+        writer = Writer(path) if self.isSaveGenerations else None
+
         bar_format = '                  ' + str(generation) + ':    {percentage:3.0f}%|{bar:80}{r_bar}'
         with tqdm(
             disable = core != 0, # show only 1 core
@@ -105,54 +130,69 @@ class Genetic:
             colour = blue,
             bar_format = bar_format) as pbar:
 
-            for i, individual in enumerate(group):
+            # screen on coarse bars, only survivors run on 1 minute bars
+            ids, records = [ i + group_size * core for i in range(len(group)) ], []
+            if self.screening is not None:
+                ids, group, pruned = self.screening.screen(ids, group, self.fitness, self.data.index, group_size)
+                records.append(Records.from_engines(pruned))
+                if writer is not None: writer.append(pruned)
+                pbar.update(group_size - len(ids))
 
-                # init strategy and engine
-                id = i + group_size * core
-                strategy = LiveStrategy(self.data, self.emas, self.fractals, individual)
-                engine = Engine(id, strategy)
+            # step individuals sharing ema columns together
+            for batch_ids, batch_params in group_params(ids, group, group_size):
 
-                # run and save
-                engine.run(
+                # init strategies and batch engine
+                strategies = [ LiveStrategy(self.data, self.emas, self.fractals, individual, self.signals) for individual in batch_params ]
+                batch = BatchEngine(batch_ids, strategies)
+
+                # run, keep compact metrics, save if needed
+                batch.run(
                     position = 2,
-                    disable = core != 0)
-                engine.save(path, False)
-                pbar.update()
+                    disable = core != 0,
+                    pruning = self.pruning,
+                    metric_names = self.metric_names,
+                    isSeries = False)
+                records.append(Records.from_engines(batch.engines))
+                if writer is not None: writer.append(batch.engines)
+                pbar.update(len(batch_ids))
 
-    def selection(self, generation, tournament_size):
+        if writer is not None: writer.close()
 
-        # organize outputs
-        path = self.generations_path + '/' + str(generation)
+        # metrics and signal cache usage of this worker, returned to parent over the pool
+        return Records.concatenate(records), (self.signals.hits - hits, self.signals.misses - misses)
 
-        # collect engine metrics from last generation
-        ids, unprofitable = range(self.population_size), 0
-        for id in ids:
+    def selection(self, generation, tournament_size, records):
 
-            engine_metrics = unpack(id, path)['metrics']
+        # filter out pruned engines, partial result
+        pruned_bars = records.column('pruned_bars')
+        isPruned = ~np.isnan(pruned_bars)
+        pruned = int(isPruned.sum())
+        self.pruned_bars += int(pruned_bars[isPruned].sum())
 
-            # filter out engines with loss
-            profit = next(metric.value for metric in engine_metrics if metric.name == 'profit')
-            if 0 > profit:
-                unprofitable += 1
-                continue
+        # filter out engines with loss
+        isUnprofitable = ~isPruned & (0 > records.column('profit'))
+        unprofitable = int(isUnprofitable.sum())
 
-            self.engine_metrics.extend(engine_metrics)
+        # metrics of the rest, params from population by id
+        profitable = records.take(~isPruned & ~isUnprofitable)
 
         # track unprofitable engines
         self.unprofitable_engines.append(unprofitable)
-        if len(self.engine_metrics) == 0:
+        self.pruned_engines.append(pruned)
+        if len(profitable) == 0:
             print(f'\n{generation}: Entire generation unprofitable.')
             exit()
 
-        # get blended fitnesses
-        fitnesses = self.fitness.blend(self.engine_metrics)
+        # get blended fitnesses, engines missing a metric have none
+        scores, best = self.fitness.blend({ name: profitable.column(name) for name in self.fitness.names })
+        fitnesses = [ (id, score) for id, score in zip(profitable.ids.tolist(), scores.tolist()) if not np.isnan(score) ]
 
         # persist best engine in generation
-        best_engine = max(fitnesses, key = lambda metric: metric.value)
-        best_params = next(metric for metric in self.engine_metrics
-        if metric.name == 'params' and metric.id == best_engine.id)
+        best_engine = self.fitness.metric(int(profitable.ids[best]), scores[best].item())
+        best_params = self.population[best_engine.id]
         self.best_engines.append(best_engine)
-        self.params.append(best_params)
+        self.best_metrics.append(records.metrics(best_engine.id, copy.copy(best_params)))
+        self.params.append(Metric('params', best_params, None, 'Params', id = best_engine.id))
 
         # check for solution convergence
         # applicable only for unblended single fitness, as blending is relative to each generation
@@ -170,17 +210,13 @@ class Genetic:
         selected = []
         for i in range(self.population_size):
 
-            # collect random sample of blended fitness metrics
+            # collect random sample of blended fitnesses
             group = random.sample(fitnesses, tournament_size)
-            winner = max(group, key = lambda metric: metric.value)
-            individual = next(metric.value for metric in self.engine_metrics
-                if metric.name == 'params' and metric.id == winner.id)
-
-            selected.append(individual)
+            winner, _ = max(group, key = lambda fitness: fitness[1])
+            selected.append(self.population[winner])
 
         # init next generation
         self.population = selected
-        self.engine_metrics = []
 
         # solution has not converged
         return False
@@ -254,13 +290,9 @@ class Genetic:
         # extract best engine in generation
         metric = self.best_engines[generation]
 
-        # unpack partial results
-        path = self.generations_path + '/' + str(generation)
-        engine = unpack(metric.id, path)
-
-        # init strategy and engine
+        # init strategy and engine, params as evaluated
         id = 'g' + str(generation) + 'e' + str(metric.id)
-        params = next(metric.value for metric in engine['metrics'] if metric.name == 'params')
+        params = next(metric.value for metric in self.best_metrics[generation] if metric.name == 'params')
         strategy = LiveStrategy(self.data, self.emas, self.fractals, params)
         engine = Engine(id, strategy)
 
@@ -299,31 +331,32 @@ class Genetic:
     def plot(self):
 
         # find engine with highest profit
+        results = Results(self.analysis_path)
         winner_profit = 0
         winner_id = ''
 
         for generation, metric in enumerate(self.best_engines):
 
-            # unpack full results
+            # load full results
             id = 'g' + str(generation) + 'e' + str(metric.id)
-            engine = unpack(id, self.analysis_path)
+            engine = results.load(id)
 
             profit = next(metric.value for metric in engine['metrics'] if metric.name == 'profit')
             if profit > winner_profit:
                 winner_profit = profit
                 winner_id = id
 
-        # unpack winner
-        winner = unpack(winner_id, self.analysis_path)
+        # load winner
+        winner = results.load(winner_id)
         params = winner['params']
         cash_series = winner['cash_series']
-        trades = winner['trades']
+        ledger = winner['ledger']
 
         # build engine, but don't run!
         strategy = LiveStrategy(self.data, self.emas, self.fractals, params)
         engine = Engine(winner_id, strategy)
         engine.cash_series = cash_series
-        engine.trades = trades
+        engine.ledger = ledger
         engine.analyze()
 
         # display winner
@@ -335,9 +368,9 @@ class Genetic:
         # overlay each generation
         for generation, metric in enumerate(self.best_engines):
 
-            # unpack full results
+            # load full results
             id = 'g' + str(generation) + 'e' + str(metric.id)
-            engine = unpack(id, self.analysis_path)
+            engine = results.load(id)
 
             fplt.plot(
                 engine['cash_series'],
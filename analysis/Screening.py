@@ -0,0 +1,82 @@
+import math
+
+from analysis.BatchEngine import BatchEngine, group_params
+from model.Metric import Metric
+from model.Records import Records
+from strategy.LiveStrategy import LiveStrategy
+from strategy.SignalCache import SignalCache
+from utils.utils import *
+
+class Screening:
+
+    # coarse-to-fine search, every candidate runs on coarse bars of the pyramid and
+    # only the fittest survivors are re-run on 1 minute bars
+
+    def __init__(self, data, emas, fractals, timeframe = 5, survivors = 0.05):
+
+        # coarse bars and indicators over the full range, in minute units
+        self.data = data
+        self.emas = emas
+        self.fractals = fractals
+        self.timeframe = timeframe # minutes per coarse bar
+        self.survivors = survivors # fraction of candidates
+
+    def window(self, index):
+
+        # coarse bars spanning the same time as 1 minute bars
+        start = self.data.index.searchsorted(index[0])
+        end = self.data.index.searchsorted(index[-1], 'right')
+        return self.data.iloc[start : end], self.emas.iloc[start : end], self.fractals.iloc[start : end]
+
+    def scale(self, strategy):
+
+        # cooloff counts bars, everything else compares against minute columns,
+        # params left as the gene so screened out engines are saved with it
+        strategy.coolOffMinutes = round(strategy.params.coolOffMinutes / self.timeframe)
+        return strategy
+
+    def screen(self, ids, params, fitness, index, batch_size):
+
+        # run all candidates on coarse bars, metrics for blend and profit only
+        data, emas, fractals = self.window(index)
+        signals = SignalCache(data, emas, fractals)
+        metric_names = fitness.names + [ 'profit' ]
+
+        engines = { }
+        for batch_ids, batch_params in group_params(ids, params, batch_size):
+            strategies = [ self.scale(LiveStrategy(data, emas, fractals, individual, signals)) for individual in batch_params ]
+            batch = BatchEngine(batch_ids, strategies)
+            batch.run(metric_names = metric_names, isSeries = False)
+            engines.update(zip(batch_ids, batch.engines))
+
+        # flag screened out as pruned, fine bars never run
+        survivors = self.select(fitness, engines)
+        pruned = [ engine for id, engine in engines.items() if id not in survivors ]
+        for engine in pruned:
+            engine.metrics.append(
+                Metric('pruned_bars', len(index) - len(data.index), None, 'Pruned bars', id = engine.id))
+
+        # survivors in original order, pruned engines for the caller to collect
+        selected = [ (id, individual) for id, individual in zip(ids, params) if id in survivors ]
+        return [ id for id, _ in selected ], [ individual for _, individual in selected ], pruned
+
+    def select(self, fitness, engines):
+
+        # profit on coarse bars
+        records = Records.from_engines(list(engines.values()))
+        profits = dict(zip(records.ids.tolist(), records.column('profit').tolist()))
+
+        # profitable ranked by blended fitness
+        profitable = records.take(records.column('profit') > 0)
+        ranked = []
+        if len(profitable) > 0:
+            scores, _ = fitness.blend({ name: profitable.column(name) for name in fitness.names })
+            fitnesses = [ (id, score) for id, score in zip(profitable.ids.tolist(), scores.tolist()) if not np.isnan(score) ]
+            ranked = [ id for id, _ in sorted(fitnesses, key = lambda pair: pair[1], reverse = True) ]
+
+        # then the rest by profit
+        isRanked = set(ranked)
+        rest = sorted((id for id in engines if id not in isRanked), key = lambda id: profits[id], reverse = True)
+
+        count = max(1, math.ceil(self.survivors * len(engines)))
+        return set((ranked + rest)[:count])
@@ -0,0 +1,176 @@
+from analysis.Engine import Engine
+from strategy.LiveStrategy import LiveStrategy
+from strategy.StreamIndicators import StreamIndicators
+from strategy.StreamSignals import StreamSignals
+from utils.utils import *
+
+# strategy arrays grown one bar at a time
+columns = [
+    'opens',
+    'highs',
+    'lows',
+    'closes',
+    'fast',
+    'fastSlope',
+    'fastLongMinutes',
+    'fastShortMinutes',
+    'slow',
+    'slowSlope',
+    'slowLongMinutes',
+    'slowShortMinutes',
+    'buyFractals',
+    'sellFractals',
+    'longSignals',
+    'shortSignals',
+    'longFastMomentums',
+    'shortFastMomentums',
+    'longRapidMomentums',
+    'shortRapidMomentums']
+
+class StreamEngine(Engine):
+
+    # steps a persistent strategy on one new bar at a time, indicators and signals
+    # are updated in O(1) instead of recomputing history
+
+    def __init__(self, id, params, timezone = 'America/Chicago', capacity = 1440):
+
+        self.params = params
+        self.timezone = timezone
+
+        # incremental state
+        self.indicators = StreamIndicators([ params.fastMinutes, params.slowMinutes ], params.fractalWidth)
+        self.signals = StreamSignals()
+
+        # strategy without history, a stream has no last bar
+        strategy = LiveStrategy(*empty_frames(params, timezone), params, self.signals)
+        strategy.last_bar_index = None
+        super().__init__(id, strategy)
+
+        # preallocate strategy arrays
+        for name in columns:
+            array = getattr(strategy, name)
+            setattr(strategy, name, np.empty(capacity, dtype = array.dtype))
+
+        # timestamps and cash balance after each fill
+        self.timestamps = []
+        self.fill_bars = []
+        self.fill_cash = []
+
+    def on_bar(self, idx, open, high, low, close):
+
+        strategy = self.strategy
+        params = self.params
+        bar_index = strategy.bar_index + 1
+
+        # update indicators and signals of newest bar
+        bar = self.indicators.update(open, high, low)
+        bar.update({ 'Open': open, 'High': high, 'Low': low })
+        self.signals.update(bar)
+
+        fast = str(params.fastMinutes)
+        slow = str(params.slowMinutes)
+        width = str(params.fractalWidth)
+        values = [
+            open,
+            high,
+            low,
+            close,
+            bar['ema_' + fast],
+            bar['slope_' + fast],
+            bar['long_' + fast],
+            bar['short_' + fast],
+            bar['ema_' + slow],
+            bar['slope_' + slow],
+            bar['long_' + slow],
+            bar['short_' + slow],
+            bar['buyFractal_' + width],
+            bar['sellFractal_' + width],
+            self.signals.is_entry_signal('long', params)[0],
+            self.signals.is_entry_signal('short', params)[0],
+            self.signals.is_exit_fast_momentum('long', params.fastMinutes, params.fastMomentumMinutes)[0],
+            self.signals.is_exit_fast_momentum('short', params.fastMinutes, params.fastMomentumMinutes)[0],
+            self.signals.is_exit_rapid_momentum('long', params.fastMinutes, params.fastAngleExitFactor)[0],
+            self.signals.is_exit_rapid_momentum('short', params.fastMinutes, params.fastAngleExitFactor)[0]]
+
+        # append to strategy arrays, double capacity when full
+        if bar_index == len(strategy.opens): self.grow()
+        for name, value in zip(columns, values):
+            getattr(strategy, name)[bar_index] = value
+
+        # set index
+        self.timestamps.append(idx)
+        self.current_idx = idx
+        strategy.current_idx = idx
+
+        # execute strat
+        num_orders = len(strategy.orders)
+        strategy.on_bar()
+
+        # fill orders, if needed
+        orders = strategy.orders[num_orders:]
+        if len(orders) > 0:
+            self.fill_orders()
+            self.fill_bars.append(bar_index)
+            self.fill_cash.append(self.cash)
+
+        return orders
+
+    def grow(self):
+
+        strategy = self.strategy
+        for name in columns:
+            array = getattr(strategy, name)
+            setattr(strategy, name, np.concatenate((array, np.empty(max(len(array), 1), dtype = array.dtype))))
+
+    def replay(self, data, position = 1, disable = True, bar_format = None):
+
+        # feed bars of a dataframe as if live
+        orders = []
+        if bar_format is None: bar_format = '                        {percentage:3.0f}%|{bar:80}{r_bar}'
+        for idx, open, high, low, close in tqdm(
+            position = position,
+            disable = disable,
+            leave = False,
+            iterable = zip(data.index, data.Open.to_numpy(), data.High.to_numpy(), data.Low.to_numpy(), data.Close.to_numpy()),
+            total = len(data.index),
+            colour = aqua,
+            bar_format = bar_format):
+
+            orders.extend(self.on_bar(idx, open, high, low, close))
+
+        return orders
+
+    def analyze(self, metric_names = None, metrics = None):
+
+        # wrap streamed bars with timestamps
+        strategy = self.strategy
+        count = strategy.bar_index + 1
+        index = pd.DatetimeIndex(self.timestamps)
+        self.data = pd.DataFrame(
+            index = index,
+            data = {
+                'Open': strategy.opens[:count],
+                'High': strategy.highs[:count],
+                'Low': strategy.lows[:count],
+                'Close': strategy.closes[:count]})
+        strategy.data = self.data
+
+        # equity is constant between fills
+        self.fill_cash_series(self.fill_bars, self.fill_cash)
+        super().analyze(metric_names, metrics)
+
+def empty_frames(params, timezone):
+
+    # ohlc, ema and fractal columns without rows
+    index = pd.DatetimeIndex([], tz = timezone)
+    data = pd.DataFrame(index = index, columns = ['Open', 'High', 'Low', 'Close'], dtype = float)
+
+    names = []
+    for minutes in dict.fromkeys([ params.fastMinutes, params.slowMinutes ]):
+        names.extend([ 'ema_' + str(minutes), 'slope_' + str(minutes), 'long_' + str(minutes), 'short_' + str(minutes) ])
+    emas = pd.DataFrame(index = index, columns = names, dtype = float)
+
+    width = str(params.fractalWidth)
+    fractals = pd.DataFrame(index = index, columns = [ 'buyFractal_' + width, 'sellFractal_' + width ], dtype = float)
+
+    return data, emas, fractals
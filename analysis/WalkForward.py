@@ -1,6 +1,8 @@
 from analysis.Analyzer import Analyzer
 from analysis.Engine import Engine
+from analysis.EventEngine import EventEngine
 from model.Fitness import Fit
+from model.Results import Results
 from strategy.LiveStrategy import LiveStrategy
 from utils.metrics import *
 from utils.utils import *
@@ -8,7 +10,7 @@ from rich.table import Table
 
 class WalkForward:
 
-    def __init__(self, num_months, percent, fitness, runs, data, emas, fractals, opt, parent_path):
+    def __init__(self, num_months, percent, fitness, runs, data, emas, fractals, opt, parent_path, pruning = None, isWarmStart = False, screening = None):
 
         self.num_months = num_months
         self.percent = percent
@@ -19,6 +21,9 @@ class WalkForward:
         self.fractals = fractals
         self.opt = opt
         self.parent_path = parent_path
+        self.pruning = pruning
+        self.isWarmStart = isWarmStart
+        self.screening = screening
 
         # organize outputs
         self.id = parent_path.split('/')[-1] + '_' + format_timestamp(datetime.now(), 'local')
@@ -51,7 +56,7 @@ class WalkForward:
         IS_fractals = self.fractals.iloc[IS_start : IS_end]
 
         # run exhaustive sweep
-        analyzer = Analyzer(run, IS_data, IS_emas, IS_fractals, self.fitness, self.opt, self.analyzer_path)
+        analyzer = Analyzer(run, IS_data, IS_emas, IS_fractals, self.fitness, self.opt, self.analyzer_path, self.pruning, self.screening)
         analyzer.run()
         analyzer.save()
 
@@ -86,14 +91,19 @@ class WalkForward:
             if metric is None: continue
 
             # extract params of fittest engine
-            IS_engine = unpack(metric.id, IS_path)
+            IS_engine = Results(IS_path).load(metric.id)
             params = IS_engine['params']
 
-            # run strategy blind with best params
+            # run strategy blind with best params, skip bars without events
             strategy = LiveStrategy(OS_data, OS_emas, OS_fractals, params)
-            engine = Engine(
+            engine = EventEngine(
                 id = run,
                 strategy = strategy)
+
+            # carry position open at end of in-sample into out-of-sample
+            if self.isWarmStart:
+                engine.restore(self.warm_start(run, params), isCarryCash = False)
+
             engine.run()
 
             # capture in-sample profit for efficiency calculation
@@ -105,13 +115,36 @@ class WalkForward:
             OS_path = self.analyzer_path + '/' + fitness.value
             engine.save(OS_path, True)
 
+    def warm_start(self, run, params):
+
+        # run in-sample through its last bar, without closing on last bar
+        IS_start = run * self.OS_len
+        IS_end = IS_start + self.IS_len
+        OS_end = IS_end + self.OS_len
+
+        strategy = LiveStrategy(
+            self.data.iloc[IS_start : OS_end],
+            self.emas.iloc[IS_start : OS_end],
+            self.fractals.iloc[IS_start : OS_end],
+            params)
+        engine = EventEngine(
+            id = run,
+            strategy = strategy)
+        engine.run(stop = self.IS_len)
+
+        return engine.snapshot()
+
     def build_composite(self, fit):
 
         cash_series = pd.Series()
-        trades = []
+        ledgers = []
         IS_profits = []
         invalid_runs = []
 
+        # scalar metrics of all OS runs, trades and equity loaded per run
+        OS_results = Results(self.analyzer_path + '/' + fit.value)
+        OS_records = OS_results.records()
+
         # stitch OS runs together
         for run in tqdm(
             iterable = range(self.runs),
@@ -124,22 +157,18 @@ class WalkForward:
             else: balance = cash_series.values[-1]
 
             # check if OS exists
-            OS_path = self.analyzer_path + '/' + fit.value
-            OS_engine_filepath = OS_path + '/' + str(run) + '.bin'
-            isProfitable = os.path.exists(OS_engine_filepath)
+            isProfitable = run in OS_records
 
             # OS exists: IS profitable
             if isProfitable:
 
                 # extract saved OS engine results
-                engine = unpack(run, OS_path)
+                engine = OS_results.load(run)
                 engine_cash_series = engine['cash_series']
-                engine_trades = engine['trades']
-                engine_metrics = engine['metrics']
+                engine_ledger = engine['ledger']
 
                 # capture in-sample profits for efficiency calculation
-                metric = next(metric for metric in engine_metrics if metric.name == 'IS_profit')
-                IS_profits.append(metric.value)
+                IS_profits.append(OS_records.value(run, 'IS_profit'))
 
                 # adjust series to starting balance
                 engine_cash_series += balance - initial_cash
@@ -163,14 +192,13 @@ class WalkForward:
                     index = self.data.index[OS_start : OS_end],
                     data = balance)
 
-                engine_trades = []
+                engine_ledger = None
+
+            # trades of run, bars offset by previous runs
+            if engine_ledger is not None: ledgers.append((engine_ledger, len(cash_series)))
 
             # cumulative cash series
             cash_series = pd.concat([cash_series, engine_cash_series], axis = 0)
-            trades.extend(engine_trades)
-
-        # reindex trades, 1-based for tradingview
-        for i, trade in enumerate(trades): trade.id = i + 1
 
         # extract fittest engines from last in-sample analyzer
         IS_path = self.analyzer_path + '/' + str(self.runs)
@@ -179,7 +207,7 @@ class WalkForward:
 
         # get params of fittest engine
         if metric is None: params = None
-        else: params = unpack(str(metric.id), IS_path)['params']
+        else: params = Results(IS_path).load(metric.id)['params']
 
         # mask indicators
         composite_data = self.data.loc[cash_series.index, :]
@@ -190,7 +218,7 @@ class WalkForward:
         strategy = LiveStrategy(composite_data, composite_emas, composite_fractals, params)
         engine = Engine(fit.value, strategy)
         engine.cash_series = cash_series
-        engine.trades = trades
+        for ledger, offset in ledgers: engine.ledger.extend(ledger, offset)
         engine.analyze() # generate metrics
 
         # calculate efficiency
@@ -224,11 +252,12 @@ class WalkForward:
     def analyze(self):
 
         # isolate composite with highest profit
+        results = Results(self.analysis_path)
         highest_profit = 0
         next_params, best_fitness = None, None
         for fitness in Fit:
 
-            engine = unpack(fitness.value, self.analysis_path)
+            engine = results.load(fitness.value)
             cash_series = engine['cash_series']
             cash = cash_series[-1]
 
@@ -270,19 +299,19 @@ class WalkForward:
         for column in columns:
             table.add_column(column)
 
-        OS_path = self.analyzer_path + '/' + self.best_fitness.value
+        OS_results = Results(self.analyzer_path + '/' + self.best_fitness.value)
+        OS_records = OS_results.records()
 
         for run in range(self.runs):
 
-            # unpack OS engine
-            try: OS_engine = unpack(str(run), OS_path)
-            except FileNotFoundError: continue
+            # skip runs without OS engine
+            if run not in OS_records: continue
 
             # extract engine metrics
-            num_trades = next(metric.value for metric in OS_engine['metrics'] if metric.name == 'num_trades')
-            profit_factor = next(metric.value for metric in OS_engine['metrics'] if metric.name == 'profit_factor')
-            profit = next(metric.value for metric in OS_engine['metrics'] if metric.name == 'profit')
-            params = OS_engine['params']
+            num_trades = OS_records.value(run, 'num_trades')
+            profit_factor = OS_records.value(run, 'profit_factor')
+            profit = OS_records.value(run, 'profit')
+            params = OS_results.load(run)['params']
 
             # add row to table
             row = [
@@ -308,11 +337,12 @@ class WalkForward:
         ax = init_plot(
             window = 1,
             title = 'Equity')
+        results = Results(self.analysis_path)
 
         for fitness in Fit:
 
-            # unpack composite engine
-            composite = unpack(fitness.value, self.analysis_path)
+            # load composite engine
+            composite = results.load(fitness.value)
             cash_series = composite['cash_series']
 
             # plot cash series
@@ -349,7 +379,7 @@ class WalkForward:
                 # deserialize previous result
                 engine.id = composite['id']
                 engine.metrics = composite['metrics']
-                engine.trades = composite['trades']
+                engine.ledger = composite['ledger']
                 engine.cash_series = cash_series
                 engine.cash = cash_series[-1]
 
@@ -5,7 +5,10 @@ from functools import partial
 from multiprocessing import Pool
 
 from analysis.Genetic import Genetic
+from analysis.Screening import Screening
 from model.Fitness import Fit, Fitness
+from model.Pruning import Pruning
+from model.Records import Records
 from strategy.LiveParams import LiveParams
 from utils.metrics import print_metrics, get_genetic_results_metrics, display_progress_bar
 from utils.utils import *
@@ -30,6 +33,17 @@ fitness = Fitness(
         (Fit.CORRELATION, 40),
     ])
 
+# screen candidates on coarse bars, re-run survivors on 1 minute bars
+isCoarseToFine = False
+screen_timeframe = 5 # minutes per coarse bar, 15 or more is faster but ranks poorly and can drop the best candidates
+
+# engines of each generation to disk, selection uses metrics returned by workers
+isSaveGenerations = False
+
+# stop hopeless engines early, otherwise run all bars
+isPruning = False
+pruning = Pruning(max_drawdown = 3000, max_trades = 5000, min_profit = -2000, checkpoint = 1440) if isPruning else None
+
 # multiprocessing uses all cores, 16 available, leave 1 for basic tasks
 cores = 10 # multiprocessing.cpu_count() - 1
 
@@ -48,6 +62,7 @@ opt = LiveParams(
     coolOffMinutes = np.linspace(0, 30, 31, dtype = int),
     trendStartHour = np.linspace(0, 12, 13, dtype = int),
     trendEndHour = np.linspace(12, 60, 49, dtype = int),
+    fractalWidth = [2], # np.linspace(2, 5, 4, dtype = int),
 )
 
 ########################################################################################################################
@@ -62,10 +77,16 @@ data_path = 'data/' + data_name
 parent_path = 'genetic/' + data_name
 path = parent_path + '/generations'
 
-# init data and indicators
+# init data and indicators, memory mapped and shared by pool workers
 data = getOhlc(asset, num_months, isNetwork)
 emas, fractals = getIndicators(data, opt, data_path)
 
+# coarse-to-fine search on timeframe pyramid, if enabled
+screening = None
+if isCoarseToFine:
+    pyramid = getPyramid(data, opt, data_path, [ screen_timeframe ])
+    screening = Screening(*pyramid[screen_timeframe], timeframe = screen_timeframe, survivors = 0.05)
+
 # remove residual analyses
 shutil.rmtree(path, ignore_errors = True)
 
@@ -80,7 +101,10 @@ genetic = Genetic(
     fractals = fractals,
     opt = opt,
     parent_path = parent_path,
-    cores = cores)
+    cores = cores,
+    pruning = pruning,
+    screening = screening,
+    isSaveGenerations = isSaveGenerations)
 
 # init header metrics
 print_metrics(genetic.metrics)
@@ -98,16 +122,20 @@ with tqdm(
 
         # split population between process cores and evaluate
         pool = Pool(cores)
-        pool.map(
+        records, signal_stats = zip(*pool.map(
             func = partial(genetic.evaluate, generation = generation),
-            iterable = range(cores))
+            iterable = range(cores)))
         pool.close()
         pool.join()
 
+        # collect signal cache usage from workers
+        genetic.signals.merge(signal_stats)
+
         # check for convergence
         isSolutionConverged = genetic.selection(
             generation = generation,
-            tournament_size = 3)
+            tournament_size = 3,
+            records = Records.concatenate(records))
 
         if isSolutionConverged:
             print(f'\n\n\t{generation}: Solution converged.')
@@ -118,9 +146,7 @@ with tqdm(
         genetic.clean()
 
         # add comment to progress bar
-        best_metric = genetic.best_engines[generation]
-        best_engine = unpack(best_metric.id, path + '/' + str(generation))
-        pbar.set_postfix_str(display_progress_bar(best_engine['metrics']))
+        pbar.set_postfix_str(display_progress_bar(genetic.best_metrics[generation]))
         pbar.update()
 
 # run and save best engines
@@ -0,0 +1,101 @@
+import math
+
+import numpy as np
+
+class Equity:
+
+    # running statistics of cash balance per bar in constant memory, enough for final
+    # cash, drawdown and linear correlation without keeping the cash series
+
+    def __init__(self, initial_cash):
+
+        self.initial_cash = initial_cash
+        self.bars = 0 # bars added so far
+
+        # current run of bars at the same cash, added to statistics when cash changes
+        self.cash = initial_cash
+        self.start = 0
+        self.length = 0
+
+        # drawdown, as cash over rolling maximum
+        self.first = None # cash of first bar
+        self.peak = -math.inf
+        self.min_ratio = math.inf
+
+        # exact sums for least squares line through origin, adjusted cash as integer over 2 ** scale
+        self.scale = 0
+        self.sum_squares = 0 # sum of adjusted cash squared
+        self.sum_products = 0 # sum of adjusted cash times bar position
+
+    @classmethod
+    def from_series(cls, cash_series, initial_cash):
+
+        # cash of each bar, constant between fills
+        cash_series = np.asarray(cash_series, dtype = float)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(cash_series)) + 1))
+        lengths = np.diff(np.append(starts, len(cash_series)))
+
+        equity = cls(initial_cash)
+        for cash, length in zip(cash_series[starts].tolist(), lengths.tolist()):
+            equity.extend(cash, length)
+
+        return equity
+
+    def extend(self, cash, bars = 1):
+
+        # same cash as last bar, lengthen current run
+        if self.length > 0 and cash == self.cash:
+            self.length += bars
+
+        else:
+            self.flush()
+            self.cash = float(cash) # as read back from a series
+            self.start = self.bars
+            self.length = bars
+
+        self.bars += bars
+
+    def flush(self):
+
+        # add current run to statistics
+        if self.length == 0: return
+        cash, start, length = self.cash, self.start, self.length
+
+        # same operations as on the full series, bar by bar
+        if self.first is None: self.first = cash
+        self.peak = max(self.peak, cash)
+        self.min_ratio = min(self.min_ratio, cash / self.peak - 1.0)
+
+        # bring sums and adjusted cash to the finer scale
+        numerator, denominator = (cash - self.initial_cash).as_integer_ratio()
+        scale = denominator.bit_length() - 1
+        if scale > self.scale:
+            self.sum_squares <<= 2 * (scale - self.scale)
+            self.sum_products <<= scale - self.scale
+            self.scale = scale
+        numerator <<= self.scale - scale
+
+        # positions of run sum to length * (2 * start + length - 1) / 2
+        self.sum_squares += numerator * numerator * length
+        self.sum_products += numerator * (length * (2 * start + length - 1) // 2)
+        self.length = 0
+
+    @property
+    def drawdown(self):
+
+        # maximum drawdown, scaled by first bar
+        self.flush()
+        return self.min_ratio * self.first
+
+    @property
+    def correlation(self):
+
+        # root mean square distance from least squares line through origin,
+        # exact until the final division
+        self.flush()
+        bars = self.bars
+        sum_positions = (bars - 1) * bars * (2 * bars - 1) // 6
+        if sum_positions == 0: return math.nan
+
+        numerator = self.sum_squares * sum_positions - self.sum_products ** 2
+        return math.sqrt(numerator / (sum_positions * bars << 2 * self.scale))
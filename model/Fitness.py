@@ -3,7 +3,6 @@ from enum import Enum
 from unittest import case
 
 import numpy as np
-import pandas as pd
 
 from model.Metric import Metric
 from utils.constants import *
@@ -13,48 +12,51 @@ class Fitness:
     def __init__(self, fits):
         self.fits = fits
 
-    def blend(self, engine_metrics):
+    @property
+    def names(self):
+
+        # engine metrics read by blend
+        return [ fit.value for fit, _ in self.fits ]
 
-        # init
-        fitness_df = pd.DataFrame(
-            index = range(len(engine_metrics)))
+    def blend(self, columns):
 
+        # blended fitness of each engine from metric columns by name, values not modified,
+        # nan where a metric is missing, with row of fittest engine
+        scores = None
         for pair in self.fits:
 
             # extract tuple
             fit, percent = pair
 
             # isolate fitness of interest
-            fitnesses = []
-            for metric in engine_metrics:
-                if metric.name == fit.value:
-                    fitnesses.append(metric)
+            fitnesses = np.asarray(columns[fit.value], dtype = float)
 
             # catch single fitness, no blend required
             if len(self.fits) == 1:
-                return fitnesses
-
-            # invert value for negative fitness (drawdown, ...)
-            if 0 > fitnesses[0].value:
-                for metric in fitnesses:
-                    metric.value = -1 / metric.value
-
-            # normalize and scale
-            best = max(fitnesses, key = lambda metric: metric.value)
-            for metric in fitnesses:
-                normalized = metric.value / best.value # normalize to 1
-                scaled = normalized * percent # scale by percent blend
-                fitness_df.loc[metric.id, fit.value] = scaled
-
-        # blend scaled fitnesses
-        values, metrics = fitness_df.sum(axis = 1, skipna = False), []
-        for id, value in enumerate(values):
-            if np.isnan(value): continue
-            title = f'[{id}] {Fit.BLEND.pretty}'
-            metrics.append(
-                Metric('blend', value, '%', title, id = id))
-
-        return metrics
+                scores = fitnesses
+                break
+
+            # invert value for negative fitness (drawdown, ...), by sign of first engine
+            present = fitnesses[~np.isnan(fitnesses)]
+            if len(present) > 0 and 0 > present[0]:
+                with np.errstate(divide = 'ignore'):
+                    fitnesses = -1 / fitnesses
+
+            # normalize to 1 and scale by percent blend
+            scaled = fitnesses / np.nanmax(fitnesses) * percent
+            scores = scaled if scores is None else scores + scaled
+
+        return scores, int(np.nanargmax(scores))
+
+    def metric(self, id, score):
+
+        # fitness of one engine, for display
+        if len(self.fits) == 1:
+            fit, _ = self.fits[0]
+            return Metric(fit.value, score, fit.unit, f'[{id}] {fit.pretty}', id = id)
+
+        title = f'[{id}] {Fit.BLEND.pretty}'
+        return Metric('blend', score, '%', title, id = id)
 
     @property
     def pretty(self):
@@ -0,0 +1,173 @@
+import numpy as np
+
+from model.Order import Order
+from model.Trade import Trade
+
+# exit reasons, stored by code
+comments = [
+    '',
+    'fastCrossover',
+    'takeProfit',
+    'lastBar',
+    'flip fastMomentum',
+    'flip shortSignal',
+    'flip longSignal',
+    'flip rapidMomentum',
+    'fastMomentum',
+    'stopLoss',
+    'rapidMomentum']
+
+codes = { comment: code for code, comment in enumerate(comments) }
+
+# one record per trade, exit fields unset while open
+trade_dtype = np.dtype([
+    ('entry_bar', np.int64),
+    ('exit_bar', np.int64),
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('side', np.int8), # 1 long, -1 short
+    ('size', np.int32), # negative for shorts!
+    ('exit_reason', np.int8)])
+
+class Ledger:
+
+    # trades of an engine as a structured array, grown in place
+
+    def __init__(self, ticker, capacity = 64):
+
+        self.ticker = ticker
+        self.buffer = np.zeros(capacity, dtype = trade_dtype)
+        self.count = 0
+        self.profits = None
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def records(self):
+        return self.buffer[:self.count]
+
+    @property
+    def is_open(self):
+        return self.count > 0 and self.buffer['exit_bar'][self.count - 1] == -1
+
+    def open(self, bar_index, price, size):
+
+        # double capacity when full
+        if self.count == len(self.buffer):
+            self.buffer = np.resize(self.buffer, 2 * len(self.buffer))
+
+        record = self.buffer[self.count]
+        record['entry_bar'] = bar_index
+        record['exit_bar'] = -1
+        record['entry_price'] = price
+        record['exit_price'] = np.nan
+        record['side'] = 1 if size > 0 else -1
+        record['size'] = size
+        record['exit_reason'] = 0
+
+        self.count += 1
+        self.profits = None
+
+    def close(self, bar_index, price, comment):
+
+        record = self.buffer[self.count - 1]
+        record['exit_bar'] = bar_index
+        record['exit_price'] = price
+        record['exit_reason'] = codes[comment]
+        self.profits = None
+
+        # realized profit of closed trade
+        return record['size'] * self.ticker.tick_value * (record['exit_price'] - record['entry_price']) / self.ticker.tick_size
+
+    @property
+    def profit(self):
+
+        # profit of all trades at once, nan while open
+        if self.profits is None:
+            records = self.records
+            self.profits = records['size'] * self.ticker.tick_value * (records['exit_price'] - records['entry_price']) / self.ticker.tick_size
+
+        return self.profits
+
+    @property
+    def is_long(self):
+        return self.records['side'] > 0
+
+    @property
+    def is_short(self):
+        return 0 > self.records['side']
+
+    def extend(self, ledger, offset):
+
+        # append trades of another ledger, shifting bars by offset
+        records = ledger.records.copy()
+        records['entry_bar'] += offset
+        records['exit_bar'][records['exit_bar'] != -1] += offset
+
+        self.buffer = np.concatenate((self.records, records))
+        self.count = len(self.buffer)
+        self.profits = None
+
+    def rebase(self, offset, isOpenOnly = False):
+
+        # copy with bars shifted by offset, drop trades closed before bar 0
+        records = self.records.copy()
+        if isOpenOnly: records = records[records['exit_bar'] == -1]
+        records['entry_bar'] += offset
+        records['exit_bar'][records['exit_bar'] != -1] += offset
+        records = records[(records['exit_bar'] == -1) | (records['exit_bar'] >= 0)]
+
+        ledger = Ledger(self.ticker, capacity = max(len(records), 1))
+        ledger.buffer[:len(records)] = records
+        ledger.count = len(records)
+        return ledger
+
+    def trades(self, index):
+
+        # trade views for display, 1-based ids for tradingview
+        trades = []
+        for i, record in enumerate(self.records):
+
+            side = 'long' if record['side'] > 0 else 'short'
+            exit_side = 'short' if record['side'] > 0 else 'long'
+            size = int(record['size'])
+
+            entry_order = Order(
+                ticker = self.ticker,
+                sentiment = side,
+                size = size,
+                idx = index[max(record['entry_bar'], 0)], # entered before data, first bar
+                bar_index = int(record['entry_bar']),
+                price = record['entry_price'],
+                comment = '')
+
+            exit_order = None
+            if record['exit_bar'] != -1:
+                exit_order = Order(
+                    ticker = self.ticker,
+                    sentiment = exit_side,
+                    size = -size,
+                    idx = index[record['exit_bar']],
+                    bar_index = int(record['exit_bar']),
+                    price = record['exit_price'],
+                    comment = comments[record['exit_reason']])
+
+            trades.append(
+                Trade(
+                    id = i + 1,
+                    side = side,
+                    size = size,
+                    entry_order = entry_order,
+                    exit_order = exit_order))
+
+        return trades
+
+    ''' serialize '''
+    def __getstate__(self):
+
+        # drop unused capacity
+        state = self.__dict__.copy()
+        state['buffer'] = self.records.copy()
+        state['profits'] = None
+        return state
@@ -0,0 +1,37 @@
+from utils.constants import initial_cash
+
+class Pruning:
+
+    # rules to stop an engine early once it cannot be useful, each optional
+
+    def __init__(self, max_drawdown = None, max_trades = None, min_profit = None, checkpoint = 1440):
+        self.max_drawdown = max_drawdown # USD, from peak cash
+        self.max_trades = max_trades
+        self.min_profit = min_profit # USD, running profit at checkpoints
+        self.checkpoint = checkpoint # bars between profit checks
+
+    def is_exceeded(self, cash, peak_cash, num_trades):
+
+        # drawdown, scaled to initial cash as in engine metrics
+        if self.max_drawdown is not None:
+            drawdown = (1 - cash / peak_cash) * initial_cash
+            if drawdown > self.max_drawdown: return True
+
+        # overtrading
+        if self.max_trades is not None:
+            if num_trades > self.max_trades: return True
+
+        return False
+
+    def is_checkpoint(self, bar_index):
+        return self.min_profit is not None and bar_index > 0 and bar_index % self.checkpoint == 0
+
+    def is_below(self, cash):
+        return self.min_profit > cash - initial_cash
+
+    def __repr__(self):
+        return (
+            f'max_drawdown: {self.max_drawdown}, '
+            f'max_trades: {self.max_trades}, '
+            f'min_profit: {self.min_profit}, '
+            f'checkpoint: {self.checkpoint}')
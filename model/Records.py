@@ -0,0 +1,124 @@
+import numpy as np
+
+from model.Metric import Metric
+
+class Records:
+
+    # scalar metrics of many engines as one float array, small enough to return
+    # from pool workers, params stay with the caller
+
+    def __init__(self, ids, names, values, kinds, columns):
+
+        self.ids = ids # engine id of each row
+        self.names = names # metric of each column
+        self.values = values # nan where missing
+        self.kinds = kinds # 0 missing, 1 float, 2 int, as saved by engine
+        self.columns = columns # unit, title, formatter by name
+
+        # row of each engine and column of each metric, constant time lookup
+        self.rows = { id: row for row, id in enumerate(self.ids.tolist()) }
+        self.positions = { name: position for position, name in enumerate(names) }
+
+    @classmethod
+    def from_engines(cls, engines):
+
+        # numeric metrics only, strings and headers are for display
+        columns = { }
+        for engine in engines:
+            for metric in engine.metrics:
+                if metric.name not in columns and get_kind(metric) > 0:
+                    columns[metric.name] = (metric.unit, metric.title, metric.formatter)
+
+        names = list(columns)
+        positions = { name: position for position, name in enumerate(names) }
+        values = np.full((len(engines), len(names)), np.nan)
+        kinds = np.zeros((len(engines), len(names)), dtype = np.int8)
+        for row, engine in enumerate(engines):
+            for metric in engine.metrics:
+                kind = get_kind(metric)
+                if kind > 0:
+                    values[row, positions[metric.name]] = metric.value
+                    kinds[row, positions[metric.name]] = kind
+
+        ids = np.array([ engine.id for engine in engines ], dtype = int)
+        return cls(ids, names, values, kinds, columns)
+
+    @classmethod
+    def empty(cls):
+
+        # no engines, no metrics
+        return cls(np.array([], dtype = int), [], np.empty((0, 0)), np.empty((0, 0), dtype = np.int8), { })
+
+    @classmethod
+    def concatenate(cls, records):
+
+        # union of metrics, ordered by engine id
+        if len(records) == 0: return cls.empty()
+        columns = { }
+        for record in records: columns.update(record.columns)
+        names = list(columns)
+        positions = { name: position for position, name in enumerate(names) }
+
+        ids = np.concatenate([ record.ids for record in records ]).astype(int)
+        values = np.full((len(ids), len(names)), np.nan)
+        kinds = np.zeros((len(ids), len(names)), dtype = np.int8)
+        start = 0
+        for record in records:
+            end = start + len(record.ids)
+            columns_of = [ positions[name] for name in record.names ]
+            values[start : end, columns_of] = record.values
+            kinds[start : end, columns_of] = record.kinds
+            start = end
+
+        order = np.argsort(ids, kind = 'stable')
+        return cls(ids[order], names, values[order], kinds[order], columns)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id):
+        return int(id) in self.rows
+
+    def take(self, isSelected):
+
+        # engines of boolean mask, in same order
+        return Records(self.ids[isSelected], self.names, self.values[isSelected], self.kinds[isSelected], self.columns)
+
+    def column(self, name):
+
+        # metric of all engines, nan where missing
+        if name not in self.positions: return np.full(len(self.ids), np.nan)
+        return self.values[:, self.positions[name]]
+
+    def value(self, id, name):
+
+        # single metric as saved, none where missing
+        row, position = self.rows[int(id)], self.positions.get(name)
+        if position is None or self.kinds[row, position] == 0: return None
+        value = self.values[row, position].item()
+        if self.kinds[row, position] == 2: value = int(value)
+        return value
+
+    def metric(self, id, name, title = None):
+
+        # metric object for display
+        unit, default, formatter = self.columns[name]
+        return Metric(name, self.value(id, name), unit, title or default, formatter, id = int(id))
+
+    def metrics(self, id, params = None):
+
+        # metric objects of one engine, as used by fitness blend
+        metrics = [ self.metric(id, name) for name in self.names if self.value(id, name) is not None ]
+        if params is not None:
+            metrics.append(
+                Metric('params', params, None, 'Params', id = int(id)))
+        return metrics
+
+def get_kind(metric):
+
+    # engine id and params kept by caller
+    value = metric.value
+    if metric.name == 'id' or isinstance(value, bool): return 0
+    if isinstance(value, (int, np.integer)): return 2
+    if isinstance(value, (float, np.floating)): return 1
+    return 0
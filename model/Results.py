@@ -0,0 +1,285 @@
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+
+from model.Metric import Metric
+from model.Records import Records
+from strategy.LiveParams import LiveParams
+
+class Results:
+
+    # engines of a generation, analyzer or analysis in one sqlite file, one row of
+    # params and scalar metrics per engine, trades and equity only if saved in full
+
+    def __init__(self, path):
+        self.path = path
+        self.filename = path + '/results.db'
+
+    def connect(self):
+
+        # autocommit, transactions opened explicitly
+        connection = sqlite3.connect(self.filename, timeout = 60, isolation_level = None)
+        connection.execute('''CREATE TABLE IF NOT EXISTS engines (id PRIMARY KEY, layout INTEGER, full BLOB)''')
+        connection.execute('''CREATE TABLE IF NOT EXISTS layouts (id INTEGER PRIMARY KEY, names TEXT UNIQUE)''')
+        connection.execute('''CREATE TABLE IF NOT EXISTS columns (name TEXT PRIMARY KEY, kind TEXT, unit, title, formatter)''')
+        return connection
+
+    def __contains__(self, id):
+
+        if not os.path.exists(self.filename): return False
+        with closing(self.connect()) as connection:
+            return connection.execute('SELECT 1 FROM engines WHERE id = ?', (get_scalar(id),)).fetchone() is not None
+
+    def __len__(self):
+
+        if not os.path.exists(self.filename): return 0
+        with closing(self.connect()) as connection:
+            return connection.execute('SELECT COUNT(*) FROM engines').fetchone()[0]
+
+    ''' write '''
+    def append(self, engines, isFull = False):
+        self.write([ get_row(engine, isFull) for engine in engines ])
+
+    def write(self, rows):
+
+        # make directory, if needed
+        if len(rows) == 0: return
+        if not os.path.exists(self.path):
+            os.makedirs(self.path)
+
+        connection = self.connect()
+        try:
+
+            # lock for writing, workers of the same store wait their turn
+            connection.execute('BEGIN IMMEDIATE')
+
+            # add columns first seen in this batch
+            existing = { column[1] for column in connection.execute('PRAGMA table_info(engines)') }
+            columns = { column[0]: column for _, engine_columns in rows for column in engine_columns }
+            for name, column in columns.items():
+                if name not in existing and any(name in row for row, _ in rows):
+                    connection.execute(f'ALTER TABLE engines ADD COLUMN "{name}"')
+            connection.executemany('INSERT OR IGNORE INTO columns VALUES (?, ?, ?, ?, ?)', columns.values())
+
+            # metric names in order, shared by most engines
+            layouts = { row['layout'] for row, _ in rows }
+            connection.executemany('INSERT OR IGNORE INTO layouts (names) VALUES (?)', [ (names,) for names in layouts ])
+            layouts = { names: connection.execute('SELECT id FROM layouts WHERE names = ?', (names,)).fetchone()[0]
+                for names in layouts }
+
+            # replace engines saved before with same id, bulk insert by column set
+            groups = { }
+            for row, _ in rows:
+                row['layout'] = layouts[row['layout']]
+                groups.setdefault(tuple(row), []).append(list(row.values()))
+            for names, values in groups.items():
+                marks = ', '.join('?' for _ in names)
+                names = ', '.join(f'"{name}"' for name in names)
+                connection.executemany(f'INSERT OR REPLACE INTO engines ({names}) VALUES ({marks})', values)
+
+            connection.execute('COMMIT')
+
+        except Exception:
+
+            # nothing to undo if lock was never taken
+            if connection.in_transaction: connection.execute('ROLLBACK')
+            raise
+
+        finally:
+            connection.close()
+
+    ''' read '''
+    def load(self, id):
+
+        # single engine as saved by Engine.save
+        bundles = self.select('WHERE id = ?', (get_scalar(id),))
+        if len(bundles) == 0: raise KeyError(f'Engine {id} not in {self.filename}')
+        return bundles[0]
+
+    def metrics(self, ids = None):
+
+        # engine metrics by id, all engines if ids not given
+        if ids is None: bundles = self.select()
+        else:
+            ids = [ get_scalar(id) for id in ids ]
+            bundles = []
+            for start in range(0, len(ids), 500): # sqlite variable limit
+                chunk = ids[start : start + 500]
+                marks = ', '.join('?' for _ in chunk)
+                bundles += self.select(f'WHERE id IN ({marks})', chunk)
+
+        return { bundle['id']: bundle['metrics'] for bundle in bundles }
+
+    def arrays(self, names):
+
+        # scalar columns of all engines, nan where missing
+        if not os.path.exists(self.filename):
+            return { 'id': np.array([]), **{ name: np.array([]) for name in names } }
+
+        with closing(self.connect()) as connection:
+            existing = { column[1] for column in connection.execute('PRAGMA table_info(engines)') }
+            selected = ', '.join(f'"{name}"' if name in existing else 'NULL' for name in names)
+            rows = connection.execute(f'SELECT id, {selected} FROM engines ORDER BY id').fetchall()
+
+        columns = list(zip(*rows)) if len(rows) > 0 else [ () ] * (len(names) + 1)
+        arrays = { 'id': np.array(columns[0]) }
+        for name, column in zip(names, columns[1:]):
+            arrays[name] = np.array([ np.nan if value is None else value for value in column ], dtype = float)
+
+        return arrays
+
+    def records(self):
+
+        # numeric metrics of all engines as one table, params and text left out
+        if not os.path.exists(self.filename):
+            return Records.empty()
+
+        with closing(self.connect()) as connection:
+            existing = { column[1] for column in connection.execute('PRAGMA table_info(engines)') }
+            columns = { name: (unit, title, formatter)
+                for name, kind, unit, title, formatter in connection.execute('SELECT * FROM columns')
+                if kind != 'param' and name in existing and name != 'id' }
+            selected = ', '.join(f'"{name}"' for name in [ 'id', *columns ])
+            rows = connection.execute(f'SELECT {selected} FROM engines ORDER BY id').fetchall()
+
+        # kind of each value as stored, text is display only
+        names = list(columns)
+        values = np.full((len(rows), len(names)), np.nan)
+        kinds = np.zeros((len(rows), len(names)), dtype = np.int8)
+        for row, (_, *row_values) in enumerate(rows):
+            for position, value in enumerate(row_values):
+                if isinstance(value, float): values[row, position], kinds[row, position] = value, 1
+                elif isinstance(value, int): values[row, position], kinds[row, position] = value, 2
+
+        ids = np.array([ row[0] for row in rows ], dtype = int)
+        return Records(ids, names, values, kinds, columns)
+
+    def select(self, where = '', args = ()):
+
+        if not os.path.exists(self.filename): return []
+        with closing(self.connect()) as connection:
+            layouts = dict(connection.execute('SELECT id, names FROM layouts'))
+            columns = { name: (kind, unit, title, formatter)
+                for name, kind, unit, title, formatter in connection.execute('SELECT * FROM columns') }
+            cursor = connection.execute(f'SELECT * FROM engines {where} ORDER BY id', args)
+            names = [ description[0] for description in cursor.description ]
+            rows = cursor.fetchall()
+
+        return [ get_bundle(dict(zip(names, row)), layouts, columns) for row in rows ]
+
+class Writer(threading.Thread):
+
+    # appends engines to a results store from a background thread, rows waiting
+    # while a write is in progress go out together in the next transaction
+
+    def __init__(self, path, chunk_size = 1000, max_pending = 16):
+
+        super().__init__(daemon = True)
+        self.results = Results(path)
+        self.chunk_size = chunk_size # rows per transaction, at most
+        self.queue = queue.Queue(maxsize = max_pending) # appends not yet written, callers block when full
+        self.error = None
+        self.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def append(self, engines, isFull = False):
+
+        # rows built by caller, engines free to be dropped after
+        if self.error is not None: raise self.error
+        self.queue.put([ get_row(engine, isFull) for engine in engines ])
+
+    def run(self):
+
+        isClosed = False
+        while not isClosed:
+
+            # wait for rows, then take all waiting up to chunk size
+            rows, item = [], self.queue.get()
+            while True:
+                if item is None:
+                    isClosed = True
+                    break
+                rows += item
+                if len(rows) >= self.chunk_size: break
+                try: item = self.queue.get_nowait()
+                except queue.Empty: break
+
+            # keep draining after failure, raised to caller
+            if self.error is not None: continue
+            try: self.results.write(rows)
+            except Exception as error: self.error = error
+
+    def close(self):
+
+        # write remaining rows and wait
+        self.queue.put(None)
+        self.join()
+        if self.error is not None: raise self.error
+
+def get_row(engine, isFull):
+
+    # params as columns, reused by params metric
+    params = engine.strategy.params
+    row, columns = { 'id': get_scalar(engine.id) }, []
+    if isinstance(params, LiveParams):
+        for name, value in vars(params).items():
+            row[name] = get_scalar(value)
+            columns.append((name, 'param', None, None, None))
+
+    # scalar metrics, nan stored as null
+    for metric in engine.metrics:
+        value = metric.value
+        if metric.name != 'id' and value is not None and not isinstance(value, LiveParams):
+            row[metric.name] = get_scalar(value)
+        kind = 'none' if value is None else 'value'
+        columns.append((metric.name, kind, metric.unit, metric.title, metric.formatter))
+
+    row['layout'] = ','.join(metric.name for metric in engine.metrics)
+
+    # trades and equity, only where needed later
+    row['full'] = None
+    if isFull: row['full'] = pickle.dumps({
+        'ledger': engine.ledger,
+        'cash_series': engine.cash_series })
+
+    return row, columns
+
+def get_scalar(value):
+
+    # numpy scalars as python
+    if isinstance(value, np.generic): return value.item()
+    return value
+
+def get_bundle(row, layouts, columns):
+
+    # params from columns, none if saved without
+    id = row['id']
+    names = [ name for name, (kind, *_) in columns.items() if kind == 'param' ]
+    params = None
+    if len(names) > 0 and row.get(names[0]) is not None:
+        params = LiveParams(**{ name: row[name] for name in names })
+
+    # metrics in saved order
+    metrics = []
+    layout = layouts[row['layout']]
+    for name in layout.split(',') if len(layout) > 0 else []:
+        kind, unit, title, formatter = columns[name]
+        value = row.get(name)
+        if name == 'id': value = id
+        elif name == 'params' and value is None: value = params
+        elif value is None and kind == 'value': value = np.nan
+        metrics.append(Metric(name, value, unit, title, formatter, id = id))
+
+    bundle = { 'id': id, 'params': params, 'metrics': metrics }
+    if row['full'] is not None: bundle.update(pickle.loads(row['full']))
+    return bundle
@@ -0,0 +1,38 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+# index of each column store, built once per process
+indexes = { }
+
+class SharedFrame(pd.DataFrame):
+
+    # read-only frame memory mapped from a column store, pickles as the store
+    # path and column names so pool workers attach to the same pages by name
+
+    _metadata = ['path']
+
+    @property
+    def _constructor(self):
+        return pd.DataFrame # slices are plain frames, still views
+
+    def __reduce__(self):
+        return attach, (self.path, list(self.columns))
+
+def attach(path, names):
+
+    # timestamps stored as utc nanoseconds, local time only computed on access
+    if path not in indexes:
+        with open(path + '/manifest.json') as file:
+            manifest = json.load(file)
+        utc = pd.DatetimeIndex(np.load(path + '/index.npy').view('M8[ns]'), tz = 'UTC')
+        indexes[path] = utc.tz_convert(manifest['timezone']).rename(manifest['name'])
+
+    # columns stay on disk, pages shared between processes
+    frame = SharedFrame(
+        index = indexes[path],
+        data = { name: np.load(path + '/' + name + '.npy', mmap_mode = 'r') for name in names },
+        copy = False)
+    frame.path = path
+    return frame
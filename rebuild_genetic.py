@@ -1,7 +1,9 @@
 import time
 import warnings
+from copy import deepcopy
 
 from analysis.Engine import Engine
+from model.Results import Results
 from strategy.LiveStrategy import LiveStrategy
 from utils.metrics import print_metrics
 from utils.utils import *
@@ -28,10 +30,8 @@ data_path = 'data/' + data_name
 parent_path = 'genetic/' + data_name
 path = parent_path + '/' + id
 
-# init data and indicators
+# init data
 data = getOhlc(asset, num_months)
-emas = unpack('emas', data_path)
-fractals = unpack('fractals', data_path)
 
 # unpack analysis
 genetic = unpack('analysis', path)
@@ -48,16 +48,23 @@ winner_id = 'g' + str(winner_generation) + 'e' + str(winner_metric.id)
 if engine is not None: winner_id = engine
 
 # unpack winning solution
-winner = unpack(winner_id, path)
+winner = Results(path).load(winner_id)
 params = winner['params']
 cash_series = winner['cash_series']
-trades = winner['trades']
+ledger = winner['ledger']
+
+# load indicators of winner only
+opt = deepcopy(params)
+opt.fastMinutes = [params.fastMinutes]
+opt.slowMinutes = [params.slowMinutes]
+opt.fractalWidth = [params.fractalWidth]
+emas, fractals = getIndicators(data, opt, data_path)
 
 # build winning engine, but don't run!
 strategy = LiveStrategy(data, emas, fractals, params)
 engine = Engine(winner_id, strategy)
 engine.cash_series = cash_series
-engine.trades = trades
+engine.ledger = ledger
 engine.analyze()
 
 # display winner
@@ -69,9 +76,9 @@ ax = engine.plot_equity(shouldShow = False)
 # plot equity of best engines
 for generation, metric in enumerate(best_engines):
 
-    # unpack full results
+    # load full results
     id = 'g' + str(generation) + 'e' + str(metric.id)
-    engine = unpack(id, path)
+    engine = Results(path).load(id)
 
     fplt.plot(
         engine['cash_series'],
@@ -1,7 +1,9 @@
 import time
 import warnings
+from copy import deepcopy
 
 from analysis.Engine import Engine
+from model.Results import Results
 from strategy.LiveStrategy import LiveStrategy
 from utils.metrics import print_metrics, print_composite_summary
 from utils.utils import *
@@ -29,10 +31,8 @@ data_path = 'data/' + data_name
 parent_path = 'wfa/' + data_name
 path = parent_path + '/' + id
 
-# init data and indicators
+# init data
 data = getOhlc(asset, num_months)
-emas = unpack('emas', data_path)
-fractals = unpack('fractals', data_path)
 
 # unpack analysis
 wfa = unpack(id, path)
@@ -45,16 +45,23 @@ print_metrics(metrics)
 print_composite_summary(composite_summary)
 
 # unpack winning solution
-winner = unpack(winner_id, path)
+winner = Results(path).load(winner_id)
 params = winner['params']
 cash_series = winner['cash_series']
-trades = winner['trades']
+ledger = winner['ledger']
+
+# load indicators of winner only
+opt = deepcopy(params)
+opt.fastMinutes = [params.fastMinutes]
+opt.slowMinutes = [params.slowMinutes]
+opt.fractalWidth = [params.fractalWidth]
+emas, fractals = getIndicators(data, opt, data_path)
 
 # build winning engine, but don't run!
 strategy = LiveStrategy(data, emas, fractals, params)
 engine = Engine(winner_id, strategy)
 engine.cash_series = cash_series
-engine.trades = trades
+engine.ledger = ledger
 engine.analyze()
 
 # display winner
@@ -5,6 +5,9 @@ from numpy import floating
 
 class LiveParams:
 
+    # bars each side of fractal, default for params saved before it was a gene
+    fractalWidth = 2
+
     def __init__(self,
         fastMinutes,
         disableEntryMinutes,
@@ -18,7 +21,8 @@ class LiveParams:
         slowAngleFactor,
         coolOffMinutes,
         trendStartHour,
-        trendEndHour):
+        trendEndHour,
+        fractalWidth = 2):
 
         self.fastMinutes = fastMinutes
         self.disableEntryMinutes = disableEntryMinutes
@@ -33,6 +37,7 @@ class LiveParams:
         self.coolOffMinutes = coolOffMinutes
         self.trendStartHour = trendStartHour
         self.trendEndHour = trendEndHour
+        self.fractalWidth = fractalWidth
 
     @property
     def size(self):
@@ -49,7 +54,8 @@ class LiveParams:
             * len(self.slowAngleFactor)
             * len(self.coolOffMinutes)
             * len(self.trendStartHour)
-            * len(self.trendEndHour))
+            * len(self.trendEndHour)
+            * len(self.fractalWidth))
 
     @property
     def one_line(self):
@@ -66,7 +72,8 @@ class LiveParams:
             f'{self.slowAngleFactor}, '
             f'{self.coolOffMinutes}, '
             f'{self.trendStartHour}, '
-            f'{self.trendEndHour}]')
+            f'{self.trendEndHour}, '
+            f'{self.fractalWidth}]')
 
     def __repr__(self):
 
@@ -84,7 +91,8 @@ class LiveParams:
                 f'\n\t\tslowAngleFactor: {pretty_list(self.slowAngleFactor)}'
                 f'\n\t\tcoolOffMinutes: {pretty_list(self.coolOffMinutes)}'
                 f'\n\t\ttrendStartHour: {pretty_list(self.trendStartHour)}'
-                f'\n\t\ttrendEndHour: {pretty_list(self.trendEndHour)}')
+                f'\n\t\ttrendEndHour: {pretty_list(self.trendEndHour)}'
+                f'\n\t\tfractalWidth: {pretty_list(self.fractalWidth)}')
 
         return (
             f'\n\t\tfastMinutes: {self.fastMinutes}'
@@ -99,7 +107,8 @@ class LiveParams:
             f'\n\t\tslowAngleFactor: {self.slowAngleFactor}'
             f'\n\t\tcoolOffMinutes: {self.coolOffMinutes}'
             f'\n\t\ttrendStartHour: {self.trendStartHour}'
-            f'\n\t\ttrendEndHour: {self.trendEndHour}')
+            f'\n\t\ttrendEndHour: {self.trendEndHour}'
+            f'\n\t\tfractalWidth: {self.fractalWidth}')
 
 def pretty_list(list):
     return (
@@ -3,16 +3,31 @@ import pandas as pd
 
 from datetime import timedelta
 from strategy.BaseStrategy import BaselineStrategy
+from strategy.SignalCache import SignalCache
 from utils.constants import *
 from utils.utils import init_plot
 
+# position and exit levels, all state carried between bars
+state = [
+    'position',
+    'longExitBarIndex',
+    'shortExitBarIndex',
+    'longFastCrossoverExit',
+    'shortFastCrossoverExit',
+    'isExitLongCrossoverEnabled',
+    'isExitShortCrossoverEnabled',
+    'longTakeProfit',
+    'shortTakeProfit',
+    'longStopLoss',
+    'shortStopLoss']
+
 class LiveStrategy(BaselineStrategy):
 
     @property
     def size(self):
         return 1
 
-    def __init__(self, data, emas, fractals, params):
+    def __init__(self, data, emas, fractals, params, signals = None):
         super().__init__()
 
         self.data = data
@@ -36,21 +51,38 @@ class LiveStrategy(BaselineStrategy):
         self.coolOffMinutes = params.coolOffMinutes
         self.trendStartMinutes = params.trendStartHour * 60
         self.trendEndMinutes = params.trendEndHour * 60
+        self.fractalWidth = params.fractalWidth
+
+        # contiguous arrays, indexed by bar position
+        self.opens = data.Open.to_numpy()
+        self.highs = data.High.to_numpy()
+        self.lows = data.Low.to_numpy()
+        self.closes = data.Close.to_numpy()
+        self.last_bar_index = len(data.index) - 1
 
         # exponential moving averages
-        self.fast = emas.loc[:, 'ema_' + str(self.fastMinutes)]
-        self.fastSlope = emas.loc[:, 'slope_' + str(self.fastMinutes)]
-        self.fastLongMinutes = emas.loc[:, 'long_' + str(self.fastMinutes)]
-        self.fastShortMinutes = emas.loc[:, 'short_' + str(self.fastMinutes)]
+        self.fast = emas.loc[:, 'ema_' + str(self.fastMinutes)].to_numpy()
+        self.fastSlope = emas.loc[:, 'slope_' + str(self.fastMinutes)].to_numpy()
+        self.fastLongMinutes = emas.loc[:, 'long_' + str(self.fastMinutes)].to_numpy()
+        self.fastShortMinutes = emas.loc[:, 'short_' + str(self.fastMinutes)].to_numpy()
 
-        self.slow = emas.loc[:, 'ema_' + str(self.slowMinutes)]
-        self.slowSlope = emas.loc[:, 'slope_' + str(self.slowMinutes)]
-        self.slowLongMinutes = emas.loc[:, 'long_' + str(self.slowMinutes)]
-        self.slowShortMinutes = emas.loc[:, 'short_' + str(self.slowMinutes)]
+        self.slow = emas.loc[:, 'ema_' + str(self.slowMinutes)].to_numpy()
+        self.slowSlope = emas.loc[:, 'slope_' + str(self.slowMinutes)].to_numpy()
+        self.slowLongMinutes = emas.loc[:, 'long_' + str(self.slowMinutes)].to_numpy()
+        self.slowShortMinutes = emas.loc[:, 'short_' + str(self.slowMinutes)].to_numpy()
 
         # fractals
-        self.buyFractals = fractals.buyFractal
-        self.sellFractals = fractals.sellFractal
+        self.buyFractals = fractals.loc[:, 'buyFractal_' + str(self.fractalWidth)].to_numpy()
+        self.sellFractals = fractals.loc[:, 'sellFractal_' + str(self.fractalWidth)].to_numpy()
+
+        # position-independent signals, shared through cache
+        if signals is None: signals = SignalCache(data, emas, fractals)
+        self.longSignals = signals.is_entry_signal('long', params)
+        self.shortSignals = signals.is_entry_signal('short', params)
+        self.longFastMomentums = signals.is_exit_fast_momentum('long', self.fastMinutes, self.fastMomentumMinutes)
+        self.shortFastMomentums = signals.is_exit_fast_momentum('short', self.fastMinutes, self.fastMomentumMinutes)
+        self.longRapidMomentums = signals.is_exit_rapid_momentum('long', self.fastMinutes, fastAngleExitFactor)
+        self.shortRapidMomentums = signals.is_exit_rapid_momentum('short', self.fastMinutes, fastAngleExitFactor)
 
         # units
         self.fastAngleEntry = fastAngleEntryFactor / 1000.0
@@ -76,12 +108,16 @@ class LiveStrategy(BaselineStrategy):
         self.longStopLoss = np.nan
         self.shortStopLoss = np.nan
 
+    @property
+    def close(self):
+        return self.closes[self.bar_index]
+
     def on_bar(self):
 
         # index
-        idx = self.current_idx
         self.bar_index += 1
         bar_index = self.bar_index
+        is_last_bar = bar_index == self.last_bar_index
 
         # todo tradingview limitation ~20k bars
         # tv_start = pd.Timestamp('2025-08-29T22:00:00', tz='America/Chicago')
@@ -89,40 +125,31 @@ class LiveStrategy(BaselineStrategy):
         #     return
 
         # params
-        fastAngleEntry = self.fastAngleEntry
-        fastAngleExit = self.fastAngleExit
-        slowAngle = self.slowAngle
-        disableEntryMinutes = self.disableEntryMinutes
         coolOffMinutes = self.coolOffMinutes
         takeProfit = self.takeProfit
         stopLoss = self.stopLoss
 
         # data
-        open = self.data.Open[idx]
-        high = self.data.High[idx]
-        low = self.data.Low[idx]
-        close = self.data.Close[idx]
+        high = self.highs[bar_index]
+        low = self.lows[bar_index]
+        close = self.closes[bar_index]
 
         # averages
-        fast = self.fast[idx]
-        fastSlope = self.fastSlope[idx]
-        fastLongMinutes = self.fastLongMinutes[idx]
-        fastShortMinutes = self.fastShortMinutes[idx]
-
-        slow = self.slow[idx]
-        slowSlope = self.slowSlope[idx]
-        slowLongMinutes = self.slowLongMinutes[idx]
-        slowShortMinutes = self.slowShortMinutes[idx]
+        fast = self.fast[bar_index]
+        slow = self.slow[bar_index]
 
-        # fractals
-        buyFractal = self.buyFractals[idx]
-        sellFractal = self.sellFractals[idx]
+        # signals
+        longSignal = self.longSignals[bar_index]
+        shortSignal = self.shortSignals[bar_index]
+        longFastMomentum = self.longFastMomentums[bar_index]
+        shortFastMomentum = self.shortFastMomentums[bar_index]
+        longRapidMomentum = self.longRapidMomentums[bar_index]
+        shortRapidMomentum = self.shortRapidMomentums[bar_index]
 
         # strategy
         longExitBarIndex = self.longExitBarIndex
         shortExitBarIndex = self.shortExitBarIndex
         fastCrossover = self.fastCrossover
-        fastMomentumMinutes = self.fastMomentumMinutes
         longTakeProfit = self.longTakeProfit
         shortTakeProfit = self.shortTakeProfit
         longStopLoss = self.longStopLoss
@@ -137,105 +164,35 @@ class LiveStrategy(BaselineStrategy):
 
         ################################################################################################################
 
-        # disable entry after fast trends in 1 direction for certain time
-        isEntryLongDisabled = (
-            disableEntryMinutes != 0
-            and fastLongMinutes > disableEntryMinutes)
-        isEntryShortDisabled = (
-            disableEntryMinutes != 0
-            and fastShortMinutes > disableEntryMinutes)
-
         # cooloff time imposed after trade exit
         hasLongEntryDelayElapsed = bar_index - longExitBarIndex > coolOffMinutes
         hasShortEntryDelayElapsed = bar_index - shortExitBarIndex > coolOffMinutes
 
         # exit, slow momentum drift against trade position
-        isExitLongFastMomentum = (
-            fastMomentumMinutes != 0
-            and is_long
-            and fastShortMinutes > fastMomentumMinutes)
-        isExitShortFastMomentum = (
-            fastMomentumMinutes != 0
-            and is_short
-            and fastLongMinutes > fastMomentumMinutes)
+        isExitLongFastMomentum = is_long and longFastMomentum
+        isExitShortFastMomentum = is_short and shortFastMomentum
 
         # exit, rapid momentum swing
-        isExitLongRapidMomentum = (
-            fastAngleExit != 0
-            and is_long
-            and -fastAngleExit > fastSlope)
-        isExitShortRapidMomentum = (
-            fastAngleExit != 0
-            and is_short
-            and fastSlope > fastAngleExit)
-
-        # slow trend is long or short
-        isEntryLongEnabled = (
-            self.trendStartMinutes == 0
-            or self.trendEndMinutes == 0
-            or self.trendEndMinutes > slowLongMinutes > self.trendStartMinutes)
-        isEntryShortEnabled = (
-            self.trendStartMinutes == 0
-            or self.trendEndMinutes == 0
-            or self.trendEndMinutes > slowShortMinutes > self.trendStartMinutes)
-
-        # entry, long fractal signal
-        isEntryLongFractal = (
-            fast > slow
-            and slowSlope > slowAngle
-            and isEntryLongEnabled
-            and fast > high > buyFractal > slow
-            and 0.8 * fastMomentumMinutes > fastShortMinutes)
-
-        # entry, long fast crossover
-        isEntryLongFastCrossover = (
-            fastAngleEntry != 0
-            and high > fast > open
-            and fastSlope > fastAngleEntry
-            and fast > slow
-            and slowSlope > slowAngle
-            and isEntryLongEnabled)
+        isExitLongRapidMomentum = is_long and longRapidMomentum
+        isExitShortRapidMomentum = is_short and shortRapidMomentum
 
         # entry, long
-        isEntryLongSignal = (
-            hasLongEntryDelayElapsed
-            and not isEntryLongDisabled
-            and (isEntryLongFractal or isEntryLongFastCrossover))
+        isEntryLongSignal = hasLongEntryDelayElapsed and longSignal
         isEntryLong = (
             ((is_flat or is_short) and isEntryLongSignal)
             or (isExitShortFastMomentum and fast > slow)
             or (isExitShortRapidMomentum and fast > slow)
-            and not self.is_last_bar)
+            and not is_last_bar)
         if isEntryLong:
             self.buy(ticker, size)
 
-        # entry, short fractal signal
-        isEntryShortFractal = (
-            slow > fast
-            and -slowAngle > slowSlope
-            and isEntryShortEnabled
-            and slow > sellFractal > low > fast
-            and 0.8 * fastMomentumMinutes > fastLongMinutes)
-
-        # entry, short fast crossover
-        isEntryShortFastCrossover = (
-            fastAngleEntry != 0
-            and open > fast > low
-            and -fastAngleEntry > fastSlope
-            and slow > fast
-            and -slowAngle > slowSlope
-            and isEntryShortEnabled)
-
         # entry, short
-        isEntryShortSignal = (
-            hasShortEntryDelayElapsed
-            and not isEntryShortDisabled
-            and (isEntryShortFractal or isEntryShortFastCrossover))
+        isEntryShortSignal = hasShortEntryDelayElapsed and shortSignal
         isEntryShort = (
             ((is_flat or is_long) and isEntryShortSignal)
             or (isExitLongFastMomentum and slow > fast)
             or (isExitLongRapidMomentum and slow > fast)
-            and not self.is_last_bar)
+            and not is_last_bar)
         if isEntryShort:
             self.sell(ticker, size)
 
@@ -325,7 +282,7 @@ class LiveStrategy(BaselineStrategy):
             or isExitLongFastMomentum
             or isExitLongTakeProfit
             or isExitLongStopLoss
-            or self.is_last_bar
+            or is_last_bar
             or isExitLongFlip
             or isExitLongRapidMomentum
         )
@@ -335,7 +292,7 @@ class LiveStrategy(BaselineStrategy):
             comment = ''
             if isExitLongFastCrossover: comment = 'fastCrossover'
             elif isExitLongTakeProfit: comment = 'takeProfit'
-            elif self.is_last_bar: comment = 'lastBar'
+            elif is_last_bar: comment = 'lastBar'
             elif isExitLongFastMomentum and slow > fast: comment = 'flip fastMomentum'
             elif is_long and isEntryShortSignal: comment = 'flip shortSignal'
             elif isExitLongRapidMomentum and slow > fast: comment = 'flip rapidMomentum'
@@ -352,7 +309,7 @@ class LiveStrategy(BaselineStrategy):
             or isExitShortFastMomentum
             or isExitShortTakeProfit
             or isExitShortStopLoss
-            or self.is_last_bar
+            or is_last_bar
             or isExitShortFlip
             or isExitShortRapidMomentum
         )
@@ -362,7 +319,7 @@ class LiveStrategy(BaselineStrategy):
             comment = ''
             if isExitShortFastCrossover: comment = 'fastCrossover'
             elif isExitShortTakeProfit: comment = 'takeProfit'
-            elif self.is_last_bar: comment = 'lastBar'
+            elif is_last_bar: comment = 'lastBar'
             elif isExitShortFastMomentum and fast > slow: comment = 'flip fastMomentum'
             elif is_short and isEntryLongSignal: comment = 'flip longSignal'
             elif isExitShortRapidMomentum and fast > slow: comment = 'flip rapidMomentum'
@@ -373,6 +330,19 @@ class LiveStrategy(BaselineStrategy):
             self.shortExitBarIndex = bar_index
             self.buy(ticker, size, comment)
 
+    ''' serialize '''
+    def snapshot(self):
+        return { name: getattr(self, name) for name in state }
+
+    def restore(self, snapshot, bar_index, shift):
+
+        for name, value in snapshot.items(): setattr(self, name, value)
+        self.bar_index = bar_index
+
+        # exit bars relative to this data, cooloff carries over
+        self.longExitBarIndex += shift
+        self.shortExitBarIndex += shift
+
     ####################################################################################################################
 
     def plot(self, window, title ='Strategy', shouldShow = False):
@@ -397,9 +367,9 @@ class LiveStrategy(BaselineStrategy):
         # plot fractals
         lastBuyPrice = 0
         lastSellPrice = 0
-        for idx in data.index:
-            buyPrice = self.buyFractals[idx]
-            sellPrice = self.sellFractals[idx]
+        for i, idx in enumerate(data.index):
+            buyPrice = self.buyFractals[i]
+            sellPrice = self.sellFractals[i]
             if buyPrice != lastBuyPrice:
                 entities.loc[idx, 'buyFractal'] = buyPrice
             if sellPrice != lastSellPrice:
@@ -423,7 +393,7 @@ class LiveStrategy(BaselineStrategy):
         # plot fast only
         else:
             fplt.plot(
-                self.fast,
+                pd.Series(self.fast, index = data.index),
                 color = get_ribbon_color(0),
                 width = 1,
                 ax = ax)
@@ -0,0 +1,225 @@
+from collections import OrderedDict
+
+import numpy as np
+
+class SignalCache:
+
+    # position-independent signals of LiveStrategy as boolean arrays over all bars,
+    # each keyed only by the params it depends on and shared between strategies
+
+    def __init__(self, data, emas, fractals, maxsize = 256):
+
+        self.data = data
+        self.emas = emas
+        self.fractals = fractals
+        self.maxsize = maxsize
+
+        # least recently used first
+        self.masks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, key, build):
+
+        # reuse cached mask
+        key = (name,) + key
+        if key in self.masks:
+            self.hits += 1
+            self.masks.move_to_end(key)
+            return self.masks[key]
+
+        # build and evict least recently used
+        self.misses += 1
+        mask = build()
+        self.masks[key] = mask
+        if len(self.masks) > self.maxsize:
+            self.masks.popitem(last = False)
+
+        return mask
+
+    def column(self, name, minutes):
+        return self.emas.loc[:, name + '_' + str(minutes)].to_numpy()
+
+    def price(self, name):
+        return self.data.loc[:, name].to_numpy()
+
+    def fractal(self, name, width):
+        return self.fractals.loc[:, name + '_' + str(width)].to_numpy()
+
+    @property
+    def lookups(self):
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self):
+        if self.lookups == 0: return 0
+        return (self.hits / self.lookups) * 100
+
+    def merge(self, stats):
+
+        # collect hits and misses from worker processes
+        for hits, misses in stats:
+            self.hits += hits
+            self.misses += misses
+
+    ####################################################################################################################
+
+    def is_slow_trend(self, side, fastMinutes, slowMinutes, slowAngleFactor):
+
+        def build():
+
+            fast = self.column('ema', fastMinutes)
+            slow = self.column('ema', slowMinutes)
+            slowSlope = self.column('slope', slowMinutes)
+            slowAngle = slowAngleFactor / 1000.0
+
+            if side == 'long': return (fast > slow) & (slowSlope > slowAngle)
+            return (slow > fast) & (-slowAngle > slowSlope)
+
+        return self.get('slow_trend', (side, fastMinutes, slowMinutes, slowAngleFactor), build)
+
+    def is_entry_enabled(self, side, slowMinutes, trendStartHour, trendEndHour):
+
+        def build():
+
+            slowTrendMinutes = self.column(side, slowMinutes)
+            trendStartMinutes = trendStartHour * 60
+            trendEndMinutes = trendEndHour * 60
+
+            if trendStartMinutes == 0 or trendEndMinutes == 0: return np.ones(len(slowTrendMinutes), dtype = bool)
+            return (trendEndMinutes > slowTrendMinutes) & (slowTrendMinutes > trendStartMinutes)
+
+        return self.get('entry_enabled', (side, slowMinutes, trendStartHour, trendEndHour), build)
+
+    def is_entry_disabled(self, side, fastMinutes, disableEntryMinutes):
+
+        def build():
+
+            fastTrendMinutes = self.column(side, fastMinutes)
+
+            if disableEntryMinutes == 0: return np.zeros(len(fastTrendMinutes), dtype = bool)
+            return fastTrendMinutes > disableEntryMinutes
+
+        return self.get('entry_disabled', (side, fastMinutes, disableEntryMinutes), build)
+
+    def is_entry_fractal(self, side, fastMinutes, slowMinutes, slowAngleFactor, trendStartHour, trendEndHour, fastMomentumMinutes, fractalWidth):
+
+        def build():
+
+            fast = self.column('ema', fastMinutes)
+            slow = self.column('ema', slowMinutes)
+            isTrend = (
+                self.is_slow_trend(side, fastMinutes, slowMinutes, slowAngleFactor)
+                & self.is_entry_enabled(side, slowMinutes, trendStartHour, trendEndHour))
+
+            if side == 'long':
+                high = self.price('High')
+                buyFractal = self.fractal('buyFractal', fractalWidth)
+                fastShortMinutes = self.column('short', fastMinutes)
+                return (
+                    isTrend
+                    & (fast > high) & (high > buyFractal) & (buyFractal > slow)
+                    & (0.8 * fastMomentumMinutes > fastShortMinutes))
+
+            low = self.price('Low')
+            sellFractal = self.fractal('sellFractal', fractalWidth)
+            fastLongMinutes = self.column('long', fastMinutes)
+            return (
+                isTrend
+                & (slow > sellFractal) & (sellFractal > low) & (low > fast)
+                & (0.8 * fastMomentumMinutes > fastLongMinutes))
+
+        key = (side, fastMinutes, slowMinutes, slowAngleFactor, trendStartHour, trendEndHour, fastMomentumMinutes, fractalWidth)
+        return self.get('entry_fractal', key, build)
+
+    def is_entry_fast_crossover(self, side, fastMinutes, slowMinutes, slowAngleFactor, trendStartHour, trendEndHour, fastAngleEntryFactor):
+
+        def build():
+
+            open = self.price('Open')
+            fast = self.column('ema', fastMinutes)
+            fastSlope = self.column('slope', fastMinutes)
+            fastAngleEntry = fastAngleEntryFactor / 1000.0
+
+            if fastAngleEntry == 0: return np.zeros(len(fast), dtype = bool)
+
+            isTrend = (
+                self.is_slow_trend(side, fastMinutes, slowMinutes, slowAngleFactor)
+                & self.is_entry_enabled(side, slowMinutes, trendStartHour, trendEndHour))
+
+            if side == 'long':
+                high = self.price('High')
+                return isTrend & (high > fast) & (fast > open) & (fastSlope > fastAngleEntry)
+
+            low = self.price('Low')
+            return isTrend & (open > fast) & (fast > low) & (-fastAngleEntry > fastSlope)
+
+        key = (side, fastMinutes, slowMinutes, slowAngleFactor, trendStartHour, trendEndHour, fastAngleEntryFactor)
+        return self.get('entry_fast_crossover', key, build)
+
+    def is_entry_signal(self, side, params):
+
+        # entry signal before cooloff, which depends on position
+        def build():
+
+            isEntryDisabled = self.is_entry_disabled(side, params.fastMinutes, params.disableEntryMinutes)
+            isEntryFractal = self.is_entry_fractal(
+                side,
+                params.fastMinutes,
+                params.slowMinutes,
+                params.slowAngleFactor,
+                params.trendStartHour,
+                params.trendEndHour,
+                params.fastMomentumMinutes,
+                params.fractalWidth)
+            isEntryFastCrossover = self.is_entry_fast_crossover(
+                side,
+                params.fastMinutes,
+                params.slowMinutes,
+                params.slowAngleFactor,
+                params.trendStartHour,
+                params.trendEndHour,
+                params.fastAngleEntryFactor)
+
+            return ~isEntryDisabled & (isEntryFractal | isEntryFastCrossover)
+
+        key = (
+            side,
+            params.fastMinutes,
+            params.disableEntryMinutes,
+            params.fastMomentumMinutes,
+            params.fastAngleEntryFactor,
+            params.slowMinutes,
+            params.slowAngleFactor,
+            params.trendStartHour,
+            params.trendEndHour,
+            params.fractalWidth)
+        return self.get('entry_signal', key, build)
+
+    def is_exit_fast_momentum(self, side, fastMinutes, fastMomentumMinutes):
+
+        # exit, slow momentum drift against trade position
+        def build():
+
+            # drift short exits long, and vice versa
+            if side == 'long': fastDriftMinutes = self.column('short', fastMinutes)
+            else: fastDriftMinutes = self.column('long', fastMinutes)
+
+            if fastMomentumMinutes == 0: return np.zeros(len(fastDriftMinutes), dtype = bool)
+            return fastDriftMinutes > fastMomentumMinutes
+
+        return self.get('exit_fast_momentum', (side, fastMinutes, fastMomentumMinutes), build)
+
+    def is_exit_rapid_momentum(self, side, fastMinutes, fastAngleExitFactor):
+
+        # exit, rapid momentum swing
+        def build():
+
+            fastSlope = self.column('slope', fastMinutes)
+            fastAngleExit = fastAngleExitFactor / 1000.0
+
+            if fastAngleExit == 0: return np.zeros(len(fastSlope), dtype = bool)
+            if side == 'long': return -fastAngleExit > fastSlope
+            return fastSlope > fastAngleExit
+
+        return self.get('exit_rapid_momentum', (side, fastMinutes, fastAngleExitFactor), build)
@@ -0,0 +1,110 @@
+import numpy as np
+
+class Ewm:
+
+    # exponentially weighted mean, mirrors pandas ewm(span).mean() with adjust
+
+    def __init__(self, span):
+        com = (span - 1) / 2.0
+        alpha = 1.0 / (1.0 + com)
+        self.decay = 1.0 - alpha
+        self.weight = 1.0
+        self.value = np.nan
+
+    def seed(self, value, count):
+
+        # resume after count observations, weight does not depend on values
+        self.value = value
+        for _ in range(count - 1):
+            weight = self.weight * self.decay + 1.0
+            if weight == self.weight: break
+            self.weight = weight
+
+    def update(self, value):
+
+        # first observation
+        if self.value != self.value:
+            self.value = value
+            return value
+
+        # decay old weight, blend in new value
+        self.weight *= self.decay
+        if self.value != value:
+            self.value = (self.weight * self.value + value) / (self.weight + 1.0)
+        self.weight += 1.0
+
+        return self.value
+
+class StreamIndicators:
+
+    # emas, slopes, trend counts and fractals updated one bar at a time in O(1),
+    # matching build_emas and build_fractals over the same history
+
+    def __init__(self, minutes, fractalWidth = 2):
+
+        self.minutes = list(dict.fromkeys(minutes))
+        self.fractalWidth = fractalWidth
+
+        # averages
+        self.raw = { min: Ewm(min) for min in self.minutes }
+        self.smoothed = { min: Ewm(round(0.2 * min)) for min in self.minutes }
+        self.prev = { min: np.nan for min in self.minutes }
+        self.longMinutes = { min: 0 for min in self.minutes }
+        self.shortMinutes = { min: 0 for min in self.minutes }
+
+        # fractal window, last 2 * width + 1 bars
+        self.highs = []
+        self.lows = []
+        self.buyPrice = np.nan
+        self.sellPrice = np.nan
+
+    def update(self, open, high, low):
+
+        bar = { }
+
+        for min in self.minutes:
+
+            # smooth averages
+            smoothed = self.smoothed[min].update(self.raw[min].update(open))
+            bar['ema_' + str(min)] = smoothed
+
+            # slope of average
+            prev = self.prev[min]
+            slope = np.rad2deg(np.atan(((smoothed - prev) / prev) * 100))
+            self.prev[min] = smoothed
+            bar['slope_' + str(min)] = slope
+
+            # trend counts
+            if slope > 0:
+                self.longMinutes[min] += 1
+                self.shortMinutes[min] = 0
+            else:
+                self.longMinutes[min] = 0
+                self.shortMinutes[min] += 1
+
+            bar['long_' + str(min)] = self.longMinutes[min]
+            bar['short_' + str(min)] = self.shortMinutes[min]
+
+        # slide fractal window
+        self.highs.append(high)
+        self.lows.append(low)
+        width = self.fractalWidth
+        if len(self.highs) > 2 * width + 1:
+            del self.highs[0]
+            del self.lows[0]
+
+        # fractal centered width bars back, staggered because can not see into the future
+        if len(self.highs) == 2 * width + 1:
+
+            highs = self.highs
+            if all(highs[width] > high for i, high in enumerate(highs) if i != width):
+                self.buyPrice = highs[width]
+
+            lows = self.lows
+            if all(lows[width] < low for i, low in enumerate(lows) if i != width):
+                self.sellPrice = lows[width]
+
+        bar['buyFractal_' + str(width)] = self.buyPrice
+        bar['sellFractal_' + str(width)] = self.sellPrice
+
+        return bar
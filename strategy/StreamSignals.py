@@ -0,0 +1,27 @@
+import numpy as np
+
+from strategy.SignalCache import SignalCache
+
+class StreamSignals(SignalCache):
+
+    # signal masks of SignalCache evaluated on the newest bar only,
+    # masks are shared within a bar and dropped on the next
+
+    def __init__(self):
+        super().__init__(data = None, emas = None, fractals = None)
+        self.bar = { }
+
+    def update(self, bar):
+
+        # newest bar as single element columns
+        self.bar = { name: np.array([ value ], dtype = float) for name, value in bar.items() }
+        self.masks.clear()
+
+    def column(self, name, minutes):
+        return self.bar.get(name + '_' + str(minutes), np.empty(0))
+
+    def price(self, name):
+        return self.bar.get(name, np.empty(0))
+
+    def fractal(self, name, width):
+        return self.bar.get(name + '_' + str(width), np.empty(0))
@@ -0,0 +1,56 @@
+import time
+import warnings
+
+from analysis.StreamEngine import StreamEngine
+from strategy.LiveParams import LiveParams
+from utils.utils import *
+
+''' stream bars one at a time through a persistent engine '''
+# INPUT ###########################################################
+
+asset = '6E'
+num_months = 20
+isNetwork = False
+
+# next params of walk-forward solution
+params = LiveParams(
+    fastMinutes = 15,
+    disableEntryMinutes = 110,
+    fastMomentumMinutes = 115,
+    fastCrossoverPercent = 80,
+    takeProfitPercent = 0.05,
+    stopLossPercent = 0,
+    fastAngleEntryFactor = 25,
+    fastAngleExitFactor = 2025,
+    slowMinutes = 2275,
+    slowAngleFactor = 20,
+    coolOffMinutes = 10,
+    trendStartHour = 10,
+    trendEndHour = 115,
+    fractalWidth = 2
+)
+
+###################################################################
+
+os.system('clear')
+warnings.filterwarnings('ignore')
+
+# replay local feed
+data = getOhlc(asset, num_months, isNetwork)
+id = format_timestamp(datetime.now(), 'local')
+engine = StreamEngine(id, params)
+
+# step each bar, print new orders
+start_time = time.time()
+for bar in data.itertuples():
+    for order in engine.on_bar(bar.Index, bar.Open, bar.High, bar.Low, bar.Close):
+        print(order, order.comment)
+
+# per bar latency
+elapsed = time.time() - start_time
+print(f'\nBars: {len(data.index)}, latency: {round(elapsed / len(data.index) * 1e6)} [us/bar]')
+
+# display results
+engine.analyze()
+engine.print_metrics()
+engine.print_trades()
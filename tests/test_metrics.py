@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from model.Equity import Equity
+from utils.metrics import batch_metrics, get_batch_metrics, get_padded, get_trade_metrics
+
+initial_cash = 10000
+days = 30
+
+# last trade of first engine still open, profit nan
+ledgers = [
+    np.array([ 120.0, -40.0, 75.0, np.nan ]),
+    np.array([ -15.0, 60.0 ]),
+    np.array([ 200.0, -80.0, -25.0, 10.0, np.nan ]),
+]
+
+def get_cash_series(profits, bars = 12):
+
+    # cash of each bar, closed trades filled every other bar
+    cash = np.full(bars, float(initial_cash))
+    for position, profit in enumerate(profits[~np.isnan(profits)]):
+        cash[2 * (position + 1):] += profit
+    return cash
+
+@pytest.mark.parametrize('isRunning', [ True, False ])
+def test_batch_matches_trade_metrics_with_open_trade(isRunning):
+
+    names = list(batch_metrics)
+    profits = get_padded(ledgers)
+    counts = np.array([ len(ledger) for ledger in ledgers ])
+    if isRunning: equity = [ Equity.from_series(get_cash_series(ledger), initial_cash) for ledger in ledgers ]
+    else: equity = np.vstack([ get_cash_series(ledger) for ledger in ledgers ])
+
+    values = get_batch_metrics(profits, counts, equity, initial_cash, days, names)
+
+    for row, ledger in enumerate(ledgers):
+        single = get_trade_metrics(ledger, np.ones(len(ledger), dtype = bool), Equity.from_series(get_cash_series(ledger), initial_cash),
+            initial_cash, days, names)
+        assert values['num_trades'][row] == len(ledger)
+        for name in names:
+            if np.ndim(single[name]) > 0: continue # per trade intermediates
+            assert values[name][row] == pytest.approx(single[name], nan_ok = True), name
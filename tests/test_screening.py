@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+
+from analysis.Screening import Screening
+from model.Fitness import Fit, Fitness
+from model.Results import Results
+from strategy.LiveParams import LiveParams
+from utils.utils import getPyramid
+
+def get_data(bars = 20000, seed = 3):
+
+    # random walk of 1 minute bars
+    rng = np.random.default_rng(seed)
+    index = pd.date_range('2025-01-01', periods = bars, freq = '1min', tz = 'UTC').tz_convert('America/Chicago')
+    close = 1.1 * np.exp(np.cumsum(rng.normal(0, 1.5e-4, bars)))
+    open = np.r_[close[0], close[:-1]]
+    data = pd.DataFrame({
+        'Open': open,
+        'High': np.maximum(open, close) * (1 + np.abs(rng.normal(0, 6e-5, bars))),
+        'Low': np.minimum(open, close) * (1 - np.abs(rng.normal(0, 6e-5, bars))),
+        'Close': close }, index = index)
+    data.index.name = 'timestamp'
+    return data
+
+def test_screened_out_engines_saved_with_their_params(tmp_path):
+
+    data = get_data()
+    params = [ LiveParams(15, 60, 55, 0, takeProfit, 0, 20, 200, 300, 1, coolOff, 0, 12)
+        for takeProfit in [ 0.05, 0.1, 0.3 ] for coolOff in [ 5, 10, 20 ] ]
+    opt = LiveParams(*[ [ value ] for value in vars(params[0]).values() ])
+
+    pyramid = getPyramid(data, opt, str(tmp_path / 'data'), [ 5 ])
+    screening = Screening(*pyramid[5], timeframe = 5, survivors = 0.25)
+    fitness = Fitness(fits = [ (Fit.PROFIT, 60), (Fit.CORRELATION, 40) ])
+    ids = list(range(len(params)))
+    _, _, pruned = screening.screen(ids, params, fitness, data.index, len(params))
+
+    # cooloff scaled for coarse bars only, gene stored unchanged
+    results = Results(str(tmp_path / 'results'))
+    results.append(pruned)
+    assert len(pruned) > 0
+    for engine in pruned:
+        assert vars(results.load(engine.id)['params']) == vars(params[engine.id])
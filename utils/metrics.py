@@ -3,12 +3,11 @@ from datetime import timedelta
 
 from rich.console import Console
 from rich.padding import Padding
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import mean_squared_error
 
 import numpy as np
+from model.Equity import Equity
 from model.Metric import Metric
-from utils.utils import format_timestamp, unpack
+from utils.utils import format_timestamp
 
 def print_metrics(metrics):
 
@@ -39,177 +38,328 @@ def print_metrics(metrics):
 
 def display_progress_bar(metrics):
 
-    profit = next(metric for metric in metrics if metric.name == 'profit').value
-    pf = round(next(metric for metric in metrics if metric.name == 'profit_factor').value, 2)
-    trades = next(metric for metric in metrics if metric.name == 'num_trades').value
-    params = next(metric for metric in metrics if metric.name == 'params').value
+    values = { metric.name: metric.value for metric in metrics }
+    profit = values['profit']
+    pf = round(values['profit_factor'], 2)
+    trades = values['num_trades']
+    params = values['params']
 
     return f'pf: {pf}, trades: {trades}, profit: {profit},\n params: {params}'
 
-def get_engine_metrics(engine):
+def get_engine_metrics(engine, names = None):
 
     # check trades exist
-    num_trades = len(engine.trades)
+    num_trades = len(engine.ledger)
     if num_trades == 0:
         return [
             Metric('no_trades', None, None, f'Engine {engine.id} has no trades'),
             Metric('profit', 0, 'USD', 'Profit')
         ]
 
-    trades = engine.trades
-    cash_series = engine.cash_series
-    id = engine.id
-    symbol = engine.strategy.ticker.symbol
-    size = engine.strategy.size
+    ledger = engine.ledger
     initial_cash = engine.initial_cash
 
-    start_date = cash_series.index[0]
-    end_date = cash_series.index[-1]
-    days = (end_date - start_date).days
-    candles = len(cash_series.index)
-
-    # format timestamp
-    start_date = format_timestamp(start_date)
-    end_date = format_timestamp(end_date)
+    # running equity of sweeps, else from the full cash series
+    if engine.cash_series is None:
+        index = engine.data.index
+        equity = engine.equity
+    else:
+        index = engine.cash_series.index
+        equity = Equity.from_series(engine.cash_series.to_numpy(), initial_cash)
 
-    cash = cash_series.iloc[-1]
-    profit = cash - initial_cash
-    trades_per_day = num_trades / days
-    profit_per_day = profit / days
-
-    wins = [ trade.profit for trade in trades if trade.profit > 0 ]
-    losses = [ trade.profit for trade in trades if 0 > trade.profit ]
-    gross_profit = sum(wins)
-    gross_loss = sum(losses)
-
-    total_return = (profit / initial_cash) * 100
-    annual_return = ((cash / initial_cash) ** (1 / (days / 365)) - 1) * 100
-    if 0 > cash: annual_return = -annual_return
-
-    if gross_loss == 0: profit_factor = np.inf
-    elif gross_profit == 0: profit_factor = -np.inf
-    else: profit_factor = gross_profit / abs(gross_loss)
-
-    # calculate maximum drawdown
-    initial_price = cash_series.iloc[0]
-    roll_max = cash_series.cummax() # series, rolling maximum
-    daily_drawdown = cash_series / roll_max - 1.0
-    max_daily_drawdown = daily_drawdown.cummin() # series, rolling minimum
-
-    drawdown = max_daily_drawdown.min() * initial_price
-    drawdown_per_profit = (drawdown / profit) * 100
-    drawdown_per_day = drawdown / days
-
-    # wins
-    num_wins = len(wins)
-    win_rate = (num_wins / num_trades) * 100
-    if num_wins == 0: average_win = 0
-    else: average_win = sum(wins) / num_wins
-
-    # losses
-    num_losses = len(losses)
-    loss_rate = (num_losses / num_trades) * 100
-    if num_losses == 0: average_loss = 0
-    else: average_loss = sum(losses) / len(losses)
-
-    expectancy = ((win_rate / 100) * average_win) + ((loss_rate / 100) * average_loss)
-
-    # percent long, short
-    longs = [trade for trade in trades if trade.is_long]
-    shorts = [trade for trade in trades if trade.is_short]
-    percent_long = round((len(longs) / num_trades) * 100)
-    percent_short = round((len(shorts) / num_trades) * 100)
-
-    # split trades in winners and losers
-    profitable_longs = [trade.profit for trade in longs if trade.profit > 0]
-    losing_longs = [trade.profit for trade in longs if 0 >= trade.profit]
-    profitable_shorts = [trade.profit for trade in shorts if trade.profit > 0]
-    losing_shorts = [trade.profit for trade in shorts if 0 > trade.profit]
-
-    avg_win_longs = np.mean(profitable_longs)
-    avg_loss_longs = np.mean(losing_longs)
-    avg_win_shorts = np.mean(profitable_shorts)
-    avg_loss_shorts = np.mean(losing_shorts)
-
-    if len(longs) == 0: win_rate_long = np.nan
-    else: win_rate_long = (len(profitable_longs) / len(longs)) * 100
-
-    if len(shorts) == 0: win_rate_short = np.nan
-    else: win_rate_short = (len(profitable_shorts) / len(shorts)) * 100
+    start_date = index[0]
+    end_date = index[-1]
+    days = (end_date - start_date).days
 
     # catch composite with final in-sample not profitable
     params = engine.strategy.params
     if params is None:
         params = 'Last in-sample analyzer not profitable!'
 
-    # calculate linear correlation
-    bar_indices = np.arange(len(cash_series)).reshape(-1, 1)
-    adjusted_cash_series = np.array(cash_series - initial_cash)
+    # only metrics asked for, sweeps need few
+    if names is not None:
+        requested = [ metric for metric in strategy_metrics if metric[0] in names ]
+        values = get_trade_metrics(ledger.profit, ledger.is_long, equity, initial_cash, days,
+            [ name for name, *_ in requested ])
 
-    regression = (
-        LinearRegression(fit_intercept = False).fit(
-            X = bar_indices, # todo simplify as cash_series.index?
-            y = adjusted_cash_series))
+        metrics = [ Metric(name, values[name], unit, title, formatter) for name, unit, title, formatter in requested ]
+        if 'params' in names: metrics.append(Metric('params', params, None, 'Params'))
+        return metrics
 
-    line = regression.predict(bar_indices)
-    mse = mean_squared_error(adjusted_cash_series, line)
-    correlation = math.sqrt(mse)
+    # format timestamp
+    start_date = format_timestamp(start_date)
+    end_date = format_timestamp(end_date)
 
     # pretty
-    candles = '{:,}'.format(candles)
+    candles = '{:,}'.format(len(index))
 
-    # negative for fitness optimization
-    num_losses = -num_losses
-    correlation = -correlation
+    # strategy metrics from trade profits and equity
+    values = get_trade_metrics(ledger.profit, ledger.is_long, equity, initial_cash, days)
 
     return [
 
         # engine
         Metric('header', None, None, 'Engine:'),
-        Metric('id', id, None, 'Id'),
+        Metric('id', engine.id, None, 'Id'),
         Metric('start_date', start_date, None, 'Start date'),
         Metric('end_date', end_date, None, 'End date'),
         Metric('candles', candles, None, 'Candles'),
         Metric('days', days, None, 'Days'),
-        Metric('symbol', symbol, None, 'Symbol'),
-        Metric('size', size, None, 'Size'),
+        Metric('symbol', engine.strategy.ticker.symbol, None, 'Symbol'),
+        Metric('size', engine.strategy.size, None, 'Size'),
         Metric('initial_cash', initial_cash, 'USD', 'Initial cash'),
 
         # strategy
         Metric('strategy_header', None, None, 'Strategy:'),
-        Metric('num_trades', num_trades, None, 'Trades'),
-        Metric('profit_factor', profit_factor, None, 'Profit factor', '.2f'),
-        Metric('drawdown', drawdown, 'USD', 'Drawdown'),
-        Metric('drawdown_per_day', drawdown_per_day, 'USD', 'Drawdown per day'),
-        Metric('profit', profit, 'USD', 'Profit'),
-        Metric('trades_per_day', trades_per_day, None, 'Trades per day', '.2f'),
-        Metric('profit_per_day', profit_per_day, 'USD', 'Profit per day'),
-        Metric('gross_profit', gross_profit, 'USD', 'Gross profit'),
-        Metric('gross_loss', gross_loss, 'USD', 'Gross loss'),
-        Metric('total_return', total_return, '%', 'Total return'),
-        Metric('annual_return', annual_return, '%', 'Annualized return'),
-        Metric('drawdown_per_profit', drawdown_per_profit, '%', 'Drawdown per profit'),
-        Metric('num_wins', num_wins, None, 'Number of wins'),
-        Metric('num_losses', num_losses, None, 'Number of losses'),
-        Metric('win_rate', win_rate, '%', 'Win rate'),
-        Metric('loss_rate', loss_rate, '%', 'Loss rate'),
-        Metric('average_win', average_win, 'USD', 'Average win'),
-        Metric('average_loss', average_loss, 'USD', 'Average loss'),
-        Metric('expectancy', expectancy, 'USD', 'Expectancy'),
-        Metric('correlation', correlation, 'USD', 'Linear correlation'),
-
-        Metric('long_percent', percent_long, '%', 'Long'),
-        Metric('short_percent', percent_short, '%', 'Short'),
-        Metric('avg_win_longs', avg_win_longs, 'USD', 'Average win (long)'),
-        Metric('avg_loss_longs', avg_loss_longs, 'USD', 'Average loss (long)'),
-        Metric('avg_win_shorts', avg_win_shorts, 'USD', 'Average win (short)'),
-        Metric('avg_loss_shorts', avg_loss_shorts, 'USD', 'Average loss (short)'),
-        Metric('win_rate_long', win_rate_long, '%', 'Win rate (long)'),
-        Metric('win_rate_short', win_rate_short, '%', 'Win rate (short)'),
+        *[ Metric(name, values[name], unit, title, formatter) for name, unit, title, formatter in strategy_metrics ],
 
         Metric('params', params, None, 'Params'),
     ]
 
+# strategy metrics in display order, name, unit, title, formatter
+strategy_metrics = [
+    ('num_trades', None, 'Trades', None),
+    ('profit_factor', None, 'Profit factor', '.2f'),
+    ('drawdown', 'USD', 'Drawdown', None),
+    ('drawdown_per_day', 'USD', 'Drawdown per day', None),
+    ('profit', 'USD', 'Profit', None),
+    ('trades_per_day', None, 'Trades per day', '.2f'),
+    ('profit_per_day', 'USD', 'Profit per day', None),
+    ('gross_profit', 'USD', 'Gross profit', None),
+    ('gross_loss', 'USD', 'Gross loss', None),
+    ('total_return', '%', 'Total return', None),
+    ('annual_return', '%', 'Annualized return', None),
+    ('drawdown_per_profit', '%', 'Drawdown per profit', None),
+    ('num_wins', None, 'Number of wins', None),
+    ('num_losses', None, 'Number of losses', None),
+    ('win_rate', '%', 'Win rate', None),
+    ('loss_rate', '%', 'Loss rate', None),
+    ('average_win', 'USD', 'Average win', None),
+    ('average_loss', 'USD', 'Average loss', None),
+    ('expectancy', 'USD', 'Expectancy', None),
+    ('correlation', 'USD', 'Linear correlation', None),
+
+    ('long_percent', '%', 'Long', None),
+    ('short_percent', '%', 'Short', None),
+    ('avg_win_longs', 'USD', 'Average win (long)', None),
+    ('avg_loss_longs', 'USD', 'Average loss (long)', None),
+    ('avg_win_shorts', 'USD', 'Average win (short)', None),
+    ('avg_loss_shorts', 'USD', 'Average loss (short)', None),
+    ('win_rate_long', '%', 'Win rate (long)', None),
+    ('win_rate_short', '%', 'Win rate (short)', None),
+]
+
+# how each strategy metric and intermediate is built, name: (dependencies, compute from dependencies)
+# inputs are profits and is_long of each trade, running equity, initial_cash and days
+trade_metrics = {
+
+    'num_trades': (('profits',), len),
+    'cash': (('equity',), lambda equity: np.float64(equity.cash)), # numpy scalars, division by zero gives inf
+    'profit': (('cash', 'initial_cash'), lambda cash, initial_cash: cash - initial_cash),
+    'trades_per_day': (('num_trades', 'days'), lambda num_trades, days: num_trades / days),
+    'profit_per_day': (('profit', 'days'), lambda profit, days: profit / days),
+
+    'wins': (('profits',), lambda profits: profits[profits > 0]),
+    'losses': (('profits',), lambda profits: profits[0 > profits]),
+    'gross_profit': (('wins',), lambda wins: get_sum(wins)),
+    'gross_loss': (('losses',), lambda losses: get_sum(losses)),
+
+    'total_return': (('profit', 'initial_cash'), lambda profit, initial_cash: (profit / initial_cash) * 100),
+    'annual_return': (('cash', 'initial_cash', 'days'), lambda cash, initial_cash, days:
+        (-1 if 0 > cash else 1) * ((cash / initial_cash) ** (1 / (days / 365)) - 1) * 100),
+
+    'profit_factor': (('gross_profit', 'gross_loss'), lambda gross_profit, gross_loss:
+        np.inf if gross_loss == 0 else -np.inf if gross_profit == 0 else gross_profit / abs(gross_loss)),
+
+    # maximum drawdown, from rolling maximum
+    'drawdown': (('equity',), lambda equity: np.float64(equity.drawdown)),
+    'drawdown_per_profit': (('drawdown', 'profit'), lambda drawdown, profit: (drawdown / profit) * 100),
+    'drawdown_per_day': (('drawdown', 'days'), lambda drawdown, days: drawdown / days),
+
+    # wins, losses
+    'num_wins': (('wins',), len),
+    'loss_count': (('losses',), len),
+    'num_losses': (('loss_count',), lambda loss_count: -loss_count), # negative for fitness optimization
+    'win_rate': (('num_wins', 'num_trades'), lambda num_wins, num_trades: (num_wins / num_trades) * 100),
+    'loss_rate': (('loss_count', 'num_trades'), lambda loss_count, num_trades: (loss_count / num_trades) * 100),
+    'average_win': (('gross_profit', 'num_wins'), lambda gross_profit, num_wins:
+        0 if num_wins == 0 else gross_profit / num_wins),
+    'average_loss': (('gross_loss', 'loss_count'), lambda gross_loss, loss_count:
+        0 if loss_count == 0 else gross_loss / loss_count),
+    'expectancy': (('win_rate', 'average_win', 'loss_rate', 'average_loss'), lambda win_rate, average_win, loss_rate, average_loss:
+        ((win_rate / 100) * average_win) + ((loss_rate / 100) * average_loss)),
+
+    # longs, shorts
+    'longs': (('profits', 'is_long'), lambda profits, is_long: profits[is_long]),
+    'shorts': (('profits', 'is_long'), lambda profits, is_long: profits[~is_long]),
+    'long_percent': (('longs', 'num_trades'), lambda longs, num_trades: round((len(longs) / num_trades) * 100)),
+    'short_percent': (('shorts', 'num_trades'), lambda shorts, num_trades: round((len(shorts) / num_trades) * 100)),
+    'avg_win_longs': (('longs',), lambda longs: np.mean(longs[longs > 0])),
+    'avg_loss_longs': (('longs',), lambda longs: np.mean(longs[0 >= longs])),
+    'avg_win_shorts': (('shorts',), lambda shorts: np.mean(shorts[shorts > 0])),
+    'avg_loss_shorts': (('shorts',), lambda shorts: np.mean(shorts[0 > shorts])),
+    'win_rate_long': (('longs',), lambda longs:
+        np.nan if len(longs) == 0 else (np.count_nonzero(longs > 0) / len(longs)) * 100),
+    'win_rate_short': (('shorts',), lambda shorts:
+        np.nan if len(shorts) == 0 else (np.count_nonzero(shorts > 0) / len(shorts)) * 100),
+
+    # linear correlation, negative for fitness optimization
+    'correlation': (('equity',), lambda equity: -equity.correlation),
+}
+
+def get_trade_metrics(profits, is_long, equity, initial_cash, days, names = None):
+
+    # strategy metrics of an engine, each built once from its dependencies, all if names not given
+    values = {
+        'profits': profits,
+        'is_long': is_long,
+        'equity': equity,
+        'initial_cash': initial_cash,
+        'days': days }
+
+    def evaluate(name):
+        if name not in values:
+            dependencies, compute = trade_metrics[name]
+            values[name] = compute(*[ evaluate(dependency) for dependency in dependencies ])
+        return values[name]
+
+    if names is None: names = [ name for name, *_ in strategy_metrics ]
+    return { name: evaluate(name) for name in names }
+
+# fitness metrics of many engines at once, name: (dependencies, compute along engine axis)
+# inputs are trade profits padded with nan, one row per engine, trades of each engine including
+# an open trade, equity, initial_cash and days
+batch_metrics = {
+
+    'num_trades': (('counts',), lambda counts: counts),
+    'cash': (('equity',), lambda equity: equity[:, -1]),
+    'profit': (('cash', 'initial_cash'), lambda cash, initial_cash: cash - initial_cash),
+    'trades_per_day': (('num_trades', 'days'), lambda num_trades, days: num_trades / days),
+    'profit_per_day': (('profit', 'days'), lambda profit, days: profit / days),
+
+    # other trades as zero, sums in same order as each engine
+    'wins': (('profits',), lambda profits: np.where(profits > 0, profits, 0.0)),
+    'losses': (('profits',), lambda profits: np.where(0 > profits, profits, 0.0)),
+    'gross_profit': (('wins',), lambda wins: get_row_sums(wins)),
+    'gross_loss': (('losses',), lambda losses: get_row_sums(losses)),
+
+    'total_return': (('profit', 'initial_cash'), lambda profit, initial_cash: (profit / initial_cash) * 100),
+    'annual_return': (('cash', 'initial_cash', 'days'), lambda cash, initial_cash, days:
+        np.where(0 > cash, -1, 1) * ((cash / initial_cash) ** (1 / (days / 365)) - 1) * 100),
+
+    'profit_factor': (('gross_profit', 'gross_loss'), lambda gross_profit, gross_loss:
+        np.where(gross_loss == 0, np.inf, np.where(gross_profit == 0, -np.inf, gross_profit / np.abs(gross_loss)))),
+
+    # maximum drawdown, from rolling maximum of each curve
+    'drawdown': (('equity',), lambda equity:
+        np.min(equity / np.maximum.accumulate(equity, axis = 1) - 1.0, axis = 1) * equity[:, 0]),
+    'drawdown_per_profit': (('drawdown', 'profit'), lambda drawdown, profit: (drawdown / profit) * 100),
+    'drawdown_per_day': (('drawdown', 'days'), lambda drawdown, days: drawdown / days),
+
+    # wins, losses
+    'num_wins': (('profits',), lambda profits: np.count_nonzero(profits > 0, axis = 1)),
+    'loss_count': (('profits',), lambda profits: np.count_nonzero(0 > profits, axis = 1)),
+    'num_losses': (('loss_count',), lambda loss_count: -loss_count), # negative for fitness optimization
+    'win_rate': (('num_wins', 'num_trades'), lambda num_wins, num_trades: (num_wins / num_trades) * 100),
+    'loss_rate': (('loss_count', 'num_trades'), lambda loss_count, num_trades: (loss_count / num_trades) * 100),
+    'average_win': (('gross_profit', 'num_wins'), lambda gross_profit, num_wins:
+        np.where(num_wins == 0, 0, gross_profit / np.maximum(num_wins, 1))),
+    'average_loss': (('gross_loss', 'loss_count'), lambda gross_loss, loss_count:
+        np.where(loss_count == 0, 0, gross_loss / np.maximum(loss_count, 1))),
+    'expectancy': (('win_rate', 'average_win', 'loss_rate', 'average_loss'), lambda win_rate, average_win, loss_rate, average_loss:
+        ((win_rate / 100) * average_win) + ((loss_rate / 100) * average_loss)),
+
+    # linear correlation of each curve, negative for fitness optimization
+    'correlation': (('equity', 'initial_cash'), lambda equity, initial_cash: -get_row_correlations(equity - initial_cash)),
+}
+
+def get_batch_metrics(profits, counts, equity, initial_cash, days, names = None):
+
+    # fitness metrics of all engines, equity as curves of each bar or running equity of each engine
+    values = {
+        'profits': profits,
+        'counts': counts,
+        'equity': equity,
+        'initial_cash': initial_cash,
+        'days': days }
+
+    # running equity already reduced to cash, drawdown and correlation
+    if not isinstance(equity, np.ndarray):
+        values['cash'] = np.array([ running.cash for running in equity ])
+        values['drawdown'] = np.array([ running.drawdown for running in equity ])
+        values['correlation'] = -np.array([ running.correlation for running in equity ])
+
+    def evaluate(name):
+        if name not in values:
+            dependencies, compute = batch_metrics[name]
+            values[name] = compute(*[ evaluate(dependency) for dependency in dependencies ])
+        return values[name]
+
+    if names is None: names = [ name for name, *_ in strategy_metrics if name in batch_metrics ]
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        return { name: evaluate(name) for name in names }
+
+def get_batch_engine_metrics(engines, names):
+
+    # engines of a batch share bars, per engine if kernel lacks a metric
+    if names is None or any(name not in batch_metrics and name != 'params' for name in names):
+        return [ get_engine_metrics(engine, names) for engine in engines ]
+
+    # engines without trades as single engines
+    traded = [ engine for engine in engines if len(engine.ledger) > 0 ]
+    metrics = { engine.id: get_engine_metrics(engine, names) for engine in engines if len(engine.ledger) == 0 }
+
+    if len(traded) > 0:
+
+        # profits padded with nan, trade counts, running equity of each engine
+        initial_cash = traded[0].initial_cash
+        index = traded[0].data.index
+        days = (index[-1] - index[0]).days
+        profits = get_padded([ engine.ledger.profit for engine in traded ])
+        counts = np.array([ len(engine.ledger) for engine in traded ])
+        equity = [ engine.equity if engine.cash_series is None else Equity.from_series(engine.cash_series.to_numpy(), initial_cash)
+            for engine in traded ]
+
+        requested = [ metric for metric in strategy_metrics if metric[0] in names ]
+        values = get_batch_metrics(profits, counts, equity, initial_cash, days, [ name for name, *_ in requested ])
+
+        # counts as python int, same as single engines, other values as numpy scalars
+        columns = [ values[name].tolist() if values[name].dtype.kind == 'i' else list(values[name]) for name, *_ in requested ]
+
+        for engine, row in zip(traded, zip(*columns)):
+            metrics[engine.id] = [ Metric(name, value, unit, title, formatter) for (name, unit, title, formatter), value in zip(requested, row) ]
+            if 'params' in names: metrics[engine.id].append(Metric('params', engine.strategy.params, None, 'Params'))
+
+    return [ metrics[engine.id] for engine in engines ]
+
+def get_padded(rows):
+
+    # ragged rows as matrix, nan after end of each row
+    padded = np.full((len(rows), max(len(row) for row in rows)), np.nan)
+    for position, row in enumerate(rows):
+        padded[position, :len(row)] = row
+    return padded
+
+def get_row_sums(values):
+
+    # left to right along each row, same rounding as builtin sum
+    if values.shape[1] == 0: return np.zeros(len(values))
+    return np.cumsum(values, axis = 1)[:, -1]
+
+def get_row_correlations(adjusted_equity):
+
+    # root mean square distance from least squares line through origin of each curve
+    bars = adjusted_equity.shape[1]
+    bar_indices = np.arange(bars, dtype = float)
+    slopes = adjusted_equity @ bar_indices / float((bars - 1) * bars * (2 * bars - 1) // 6)
+    return np.sqrt(np.mean((adjusted_equity - slopes[:, None] * bar_indices) ** 2, axis = 1))
+
+def get_sum(values):
+
+    # left to right, same rounding as builtin sum
+    if len(values) == 0: return 0
+    return np.cumsum(values)[-1]
+
 def get_analyzer_metrics(analyzer):
 
     start_date = analyzer.data.index[0]
@@ -217,9 +367,7 @@ def get_analyzer_metrics(analyzer):
     num_engines = analyzer.opt.size
 
     # calculate percent profitable
-    profitable = 0
-    for id in np.arange(num_engines):
-        profitable += next((1 for metric in analyzer.engine_metrics if metric.id == id), 0)
+    profitable = sum(1 for id in range(num_engines) if id in analyzer.records)
     profitable_percent = (profitable / num_engines) * 100
 
     days = (analyzer.data.index[-1] - analyzer.data.index[0]).days
@@ -231,6 +379,8 @@ def get_analyzer_metrics(analyzer):
 
     # pretty
     candles = '{:,}'.format(candles)
+    signal_lookups = '{:,}'.format(analyzer.signals.lookups)
+    pruned_bars = '{:,}'.format(analyzer.pruned_bars)
 
     return [
         Metric('header', None, None, 'Analyzer:'),
@@ -241,6 +391,10 @@ def get_analyzer_metrics(analyzer):
         Metric('end_date', end_date, None, 'End date'),
         Metric('candles', candles, None, 'Candles'),
         Metric('days', days, None, 'Days'),
+        Metric('signal_lookups', signal_lookups, None, 'Signal cache lookups'),
+        Metric('signal_hit_rate', analyzer.signals.hit_rate, '%', 'Signal cache hit rate'),
+        Metric('pruned_engines', analyzer.pruned_engines, None, 'Pruned engines'),
+        Metric('pruned_bars', pruned_bars, None, 'Pruned bars saved'),
     ]
 
 def init_walk_forward_metrics(wfa):
@@ -353,17 +507,26 @@ def init_genetic_metrics(genetic):
 
 def get_genetic_results_metrics(genetic):
 
+    # pretty
+    signal_lookups = '{:,}'.format(genetic.signals.lookups)
+    pruned_bars = '{:,}'.format(genetic.pruned_bars)
+
     # summarize each generation
-    metrics = [ Metric('header', None, None, 'Generations:') ]
+    metrics = [
+        Metric('signal_lookups', signal_lookups, None, 'Signal cache lookups'),
+        Metric('signal_hit_rate', genetic.signals.hit_rate, '%', 'Signal cache hit rate'),
+        Metric('pruned_engines', sum(genetic.pruned_engines), None, 'Pruned engines'),
+        Metric('pruned_bars', pruned_bars, None, 'Pruned bars saved'),
+        Metric('header', None, None, 'Generations:')
+    ]
     for generation, metric in enumerate(genetic.best_engines):
 
-        # unpack best engines
-        path = genetic.parent_path + '/generations' + '/' + str(generation)
-        engine = unpack(metric.id, path)
+        # metrics of best engines, kept in memory by selection
+        engine_metrics = genetic.best_metrics[generation]
 
-        # percent of population unprofitable
+        # percent of population unprofitable or pruned
         population_size = genetic.population_size
-        unprofitable = genetic.unprofitable_engines[generation]
+        unprofitable = genetic.unprofitable_engines[generation] + genetic.pruned_engines[generation]
         profitable_percent = round(((population_size - unprofitable) / population_size) * 100)
 
         # format
@@ -383,7 +546,7 @@ def get_genetic_results_metrics(genetic):
         # multiple fitness targets, blended
         else:
 
-            value = f'\t{display_progress_bar(engine['metrics'])}'
+            value = f'\t{display_progress_bar(engine_metrics)}'
             value += f',\tProfitable: {profitable_percent} [%]'
 
         # add params
@@ -1,7 +1,8 @@
+import hashlib
+import json
 import os
 import os
 import pickle
-import shutil
 from datetime import timedelta, datetime
 
 import databento as db
@@ -12,9 +13,16 @@ from PyQt6.QtGui import QFont
 from tqdm import tqdm
 
 import local.api_keys as keys
+from model.SharedFrame import attach, indexes
+from strategy.StreamIndicators import Ewm
 from utils.constants import *
 
-def getOhlc(asset, num_months, isNetwork = False):
+# indicator definitions, bump to rebuild stored columns
+ohlc_version = 1
+ema_version = 2
+fractal_version = 1
+
+def getOhlc(asset, num_months, isNetwork = False, fetcher = None):
 
     # organize outputs
     data_name = asset + '_' + str(num_months) + 'm'
@@ -30,6 +38,10 @@ def getOhlc(asset, num_months, isNetwork = False):
 
         print(f'Upload ohlc from {csv_filename}')
 
+        # binary columns of csv, parse csv only if changed
+        ohlc = load_ohlc(csv_filepath, path)
+        if ohlc is not None: return ohlc
+
         try:
             ohlc = pd.read_csv(csv_filepath, index_col = 0)
             ohlc.index = timestamp(ohlc, timezone)
@@ -39,84 +51,228 @@ def getOhlc(asset, num_months, isNetwork = False):
             print(f'{csv_filename} does not exist, download $$$?')
             exit()
 
-        return ohlc
+        return shareOhlc(ohlc, path, csv_filepath)
 
     print(f'$$$ Download ohlc from databento as {csv_filename}')
 
-    # construct symbol
-    # https://databento.com/docs/standards-and-conventions/symbology#continuous?historical=python&live=python&reference=python
-    symbol = asset + '.v.0' # ["NQ.v.0"], # [ticker].v.[expiry]
-
     # timespan
     delta = timedelta(days = num_months * 30.437)
     starting_date = (datetime.now() - delta).strftime("%Y-%m-%d") # trump elected 051124
     ending_date = datetime.now().strftime("%Y-%m-%d") # '2025-07-24'
+    start = pd.Timestamp(starting_date, tz = 'UTC')
+    end = pd.Timestamp(ending_date, tz = 'UTC')
+
+    # cached bars, if any, history kept beyond the window
+    history_filepath = path + '/' + data_name + '_history.csv'
+    if os.path.exists(history_filepath): ohlc = pd.read_csv(history_filepath, index_col = 0)
+    else:
+        ohlc = load_ohlc(csv_filepath, path)
+        if ohlc is None and os.path.exists(csv_filepath):
+            ohlc = pd.read_csv(csv_filepath, index_col = 0)
+    if ohlc is not None: ohlc.index = timestamp(ohlc, timezone)
+
+    # request only missing spans in the window, costs $$$, synchronous
+    if fetcher is None: fetcher = fetch_databento
+    frames = [] if ohlc is None else [ ohlc ]
+    for span_start, span_end in get_missing_spans(None if ohlc is None else ohlc.index, start, end):
+        if start >= span_end: continue
+        span_start = max(span_start, start)
+        print(f'\t{span_start} to {span_end}')
+        frame = fetcher(asset, span_start, span_end)
+        frame.index = timestamp(frame, timezone)
+        frames.append(frame)
+
+    # merge, newest bar wins
+    ohlc = pd.concat(frames).sort_index()
+    ohlc = ohlc[~ohlc.index.duplicated(keep = 'last')]
+
+    # save to disk, stored indicators kept
+    if not os.path.exists(path):
+        os.makedirs(path)
+    ohlc.to_csv(history_filepath)
+
+    # window of num_months only, indicators continued while its start is unchanged
+    ohlc = ohlc[(ohlc.index >= start) & (end > ohlc.index)]
+    ohlc.to_csv(csv_filepath)
+    return shareOhlc(ohlc, path, csv_filepath)
+
+def get_missing_spans(index, start, end, max_gap = timedelta(days = 4)):
+
+    # whole window if nothing cached
+    if index is None or len(index) == 0: return [ (start, end) ]
+
+    # before first bar
+    spans = []
+    first = index[0].tz_convert('UTC')
+    last = index[-1].tz_convert('UTC')
+    if first > start: spans.append((start, first))
 
-    # request network data, costs $$$, synchronous
+    # holes longer than a holiday weekend
+    utc = index.tz_convert('UTC')
+    gaps = np.flatnonzero(np.diff(index.as_unit('ns').asi8) > pd.Timedelta(max_gap).value)
+    for i in gaps:
+        spans.append((utc[i] + timedelta(minutes = 1), utc[i + 1]))
+
+    # after last bar
+    if end > last + timedelta(minutes = 1): spans.append((last + timedelta(minutes = 1), end))
+
+    return spans
+
+def fetch_databento(asset, start, end):
+
+    # construct symbol
+    # https://databento.com/docs/standards-and-conventions/symbology#continuous?historical=python&live=python&reference=python
+    symbol = asset + '.v.0' # ["NQ.v.0"], # [ticker].v.[expiry]
+
+    # request network data, end exclusive
     ohlc = db.Historical(keys.db).timeseries.get_range(
         dataset = 'GLBX.MDP3',
         symbols = symbol,
         stype_in = 'continuous',
         schema = 'ohlcv-1m',
-        start = starting_date,
-        end = ending_date
+        start = start,
+        end = end
     )
 
-    # rename, drop, timestamp
+    # rename, drop
     ohlc = ohlc.to_df()
     ohlc.rename(columns = {"open": "Open", "high": "High", "low": "Low", "close": "Close"}, inplace = True)
     ohlc.index.rename("timestamp", inplace = True)
     ohlc = ohlc[ohlc.columns.drop(['symbol', 'rtype', 'instrument_id', 'publisher_id', 'volume'])]
-    ohlc.index = timestamp(ohlc, timezone)
+    return ohlc
 
-    # remove residual data and indicators
-    shutil.rmtree(path, ignore_errors = True)
-    os.makedirs(path)
+def file_fetcher(filepath):
 
-    # save to disk
-    ohlc.to_csv(csv_filepath)
-    return ohlc
+    # stand-in for databento, serves spans of a local csv
+    source = pd.read_csv(filepath, index_col = 0)
+    source.index = pd.to_datetime(source.index, utc = True)
+
+    def fetch(asset, start, end):
+        return source[(source.index >= start) & (end > source.index)].copy()
+
+    return fetch
 
 def timestamp(data, timezone):
     utc = pd.to_datetime(data.index, utc = True)
     return utc.tz_convert(timezone)
 
-def getIndicators(data, opt, path):
+def getIndicators(data, opt, path, timeframe = 1):
 
-    # check emas
-    shouldBuildEmas = False
-    try:
+    # indicator columns stored one file each, build only missing
+    store = path + '/columns'
+    manifest = get_manifest(data, store)
 
-        emas = unpack('emas', path)
-        for fastMinutes in opt.fastMinutes:
-            if 'ema_' + str(fastMinutes) not in emas.columns:
-                shouldBuildEmas = True
-        for slowMinutes in opt.slowMinutes:
-            if 'ema_' + str(slowMinutes) not in emas.columns:
-                shouldBuildEmas = True
+    # columns stored before bars were appended, continued instead of rebuilt
+    prefix = manifest.get('prefix', { 'bars': 0, 'columns': { } })
 
-    except FileNotFoundError:
-        shouldBuildEmas = True
+    # check emas, build missing or outdated spans only
+    mins = [ min for min in dict.fromkeys([ *opt.fastMinutes, *opt.slowMinutes ])
+        if manifest['columns'].get('ema_' + str(min)) != ema_version ]
+    extend_mins = [ min for min in mins
+        if prefix['columns'].get('ema_' + str(min)) == ema_version ]
+    build_mins = [ min for min in mins if min not in extend_mins ]
+
+    if len(mins) > 0: print(f'\nIndicators:')
+    if len(extend_mins) > 0:
+        save_columns(extend_emas(data, extend_mins, prefix['bars'], store, timeframe), ema_version, manifest, store)
+    if len(build_mins) > 0:
+        save_columns(build_emas(data, build_mins, timeframe), ema_version, manifest, store)
+
+    # check fractals, build missing or outdated widths only
+    widths = [ width for width in dict.fromkeys(opt.fractalWidth)
+        if manifest['columns'].get('buyFractal_' + str(width)) != fractal_version ]
+    extend_widths = [ width for width in widths
+        if prefix['columns'].get('buyFractal_' + str(width)) == fractal_version and prefix['bars'] > 2 * width ]
+    build_widths = [ width for width in widths if width not in extend_widths ]
+
+    if len(extend_widths) > 0:
+        save_columns(extend_fractals(data, extend_widths, prefix['bars'], store), fractal_version, manifest, store)
+    if len(build_widths) > 0:
+        save_columns(build_fractals(data, build_widths), fractal_version, manifest, store)
+
+    return load_indicators(opt, path)
+
+def load_indicators(opt, path):
+
+    # map only columns referenced by opt
+    store = path + '/columns'
+
+    ema_names = []
+    for min in dict.fromkeys([ *opt.fastMinutes, *opt.slowMinutes ]):
+        ema_names.extend([ 'ema_' + str(min), 'slope_' + str(min), 'long_' + str(min), 'short_' + str(min) ])
+
+    fractal_names = []
+    for width in dict.fromkeys(opt.fractalWidth):
+        fractal_names.extend([ 'buyFractal_' + str(width), 'sellFractal_' + str(width) ])
+
+    emas = attach(store, ema_names)
+    fractals = attach(store, fractal_names)
+
+    return emas, fractals
+
+def shareOhlc(data, path, source = None):
+
+    # ohlc memory mapped from column store, pool workers attach instead of copying
+    store = path + '/columns'
+    manifest = get_manifest(data, store)
 
-    # build emas, if needed
-    if shouldBuildEmas:
-        print(f'\nIndicators:')
-        emas = build_emas(data, opt, path)
+    names = list(data.columns)
+    if any(manifest['columns'].get(name) != ohlc_version for name in names):
+        save_columns(data, ohlc_version, manifest, store)
 
-    # check fractals and build, if needed
+    # remember csv written from, skips parsing next time
+    if source is not None and manifest.get('source') != get_source(source):
+        manifest['source'] = get_source(source)
+        save_manifest(manifest, store)
+
+    return attach(store, names)
+
+def getPyramid(data, opt, path, timeframes = [ 5, 15, 60 ]):
+
+    # coarse bars and indicators derived from 1 minute, stored per timeframe
+    pyramid = { }
+    for timeframe in timeframes:
+        coarse_path = path + '/' + str(timeframe) + 'm'
+        coarse = shareOhlc(resample(data, timeframe), coarse_path)
+        emas, fractals = getIndicators(coarse, opt, coarse_path, timeframe)
+        pyramid[timeframe] = (coarse, emas, fractals)
+
+    return pyramid
+
+def resample(data, timeframe):
+
+    # bars labeled by first minute, empty bins dropped
+    ohlc = data.resample(str(timeframe) + 'min', label = 'left', closed = 'left').agg({
+        'Open': 'first',
+        'High': 'max',
+        'Low': 'min',
+        'Close': 'last' })
+
+    return ohlc.dropna()
+
+def load_ohlc(source, path):
+
+    # memory mapped ohlc, if columns were saved from this csv
+    store = path + '/columns'
     try:
-        fractals = unpack('fractals', path)
+        with open(store + '/manifest.json') as file:
+            manifest = json.load(file)
+        if manifest.get('source') != get_source(source): return None
     except FileNotFoundError:
-        fractals = build_fractals(data, path)
+        return None
 
-    return emas, fractals
+    names = [ 'Open', 'High', 'Low', 'Close' ]
+    if any(manifest['columns'].get(name) != ohlc_version for name in names): return None
 
-def build_emas(data, opt, path):
+    return attach(store, names)
 
-    # define ema window lengths
-    mins = []
-    mins.extend(opt.fastMinutes)
-    mins.extend(opt.slowMinutes)
+def get_source(filepath):
+
+    # size and modification time, changes when csv is rewritten
+    stat = os.stat(filepath)
+    return [ stat.st_size, stat.st_mtime_ns ]
+
+def build_emas(data, mins, timeframe = 1):
 
     # init container
     emas = pd.DataFrame(index = data.index)
@@ -126,101 +282,155 @@ def build_emas(data, opt, path):
         colour = yellow,
         bar_format = '        Averages:       {percentage:3.0f}%|{bar:80}{r_bar}'):
 
-        # column names
-        col_ema = 'ema_' + str(min)
-        col_slope = 'slope_' + str(min)
-        col_long = 'long_' + str(min)
-        col_short = 'short_' + str(min)
-
-        # smooth averages
-        smooth = round(0.2 * min)
+        # smooth averages, spans in bars of timeframe
+        span, smooth = get_spans(min, timeframe)
 
-        raw = pd.Series(data.Open).ewm(span = min).mean()
+        raw = pd.Series(data.Open).ewm(span = span).mean()
         smoothed = raw.ewm(span = smooth).mean()
-        emas.loc[:, col_ema] = smoothed
-
-        # slope of average
-        slope = get_slope(smoothed)
-        emas.loc[:, col_slope] = slope
-
-        # build trend counts
-        longMinutes = 0
-        shortMinutes = 0
-        for idx in tqdm(
-            leave = False,
-            position = 1,
-            iterable = data.index,
-            colour = aqua,
-            bar_format = '                        {percentage:3.0f}%|{bar:80}{r_bar}'):
-
-            if slope[idx] > 0:
-                longMinutes += 1
-                shortMinutes = 0
-            else:
-                longMinutes = 0
-                shortMinutes += 1
-
-            emas.loc[idx, col_long] = longMinutes
-            emas.loc[idx, col_short] = shortMinutes
-
-    save(emas, 'emas', path)
+        set_emas(emas, min, raw, smoothed, timeframe)
+
+    return emas
+
+def extend_emas(data, mins, bars, path, timeframe = 1):
+
+    # continue stored averages over bars appended after the first bars
+    emas = pd.DataFrame(index = data.index)
+    opens = data.Open.to_numpy()[bars:]
+
+    for min in tqdm(
+        iterable = mins,
+        colour = yellow,
+        bar_format = '        Extend:         {percentage:3.0f}%|{bar:80}{r_bar}'):
+
+        stored_raw = np.load(path + '/raw_' + str(min) + '.npy')
+        stored_smoothed = np.load(path + '/ema_' + str(min) + '.npy')
+
+        # resume both averages at last stored bar
+        span, smooth = get_spans(min, timeframe)
+        raw_ewm = Ewm(span)
+        raw_ewm.seed(stored_raw[-1], bars)
+        smoothed_ewm = Ewm(smooth)
+        smoothed_ewm.seed(stored_smoothed[-1], bars)
+
+        raw = np.empty(len(opens))
+        smoothed = np.empty(len(opens))
+        for i, open in enumerate(opens):
+            raw[i] = raw_ewm.update(open)
+            smoothed[i] = smoothed_ewm.update(raw[i])
+
+        set_emas(
+            emas,
+            min,
+            pd.Series(np.concatenate((stored_raw, raw)), index = data.index),
+            pd.Series(np.concatenate((stored_smoothed, smoothed)), index = data.index),
+            timeframe)
+
     return emas
 
-def get_slope(series):
+def get_spans(min, timeframe):
+
+    # ema and smoothing spans in bars, minutes on 1 minute bars
+    span = min
+    smooth = round(0.2 * min)
+    if timeframe == 1: return span, smooth
+
+    return max(span / timeframe, 1), max(smooth / timeframe, 1)
+
+def set_emas(emas, min, raw, smoothed, timeframe = 1):
 
-    slope = pd.Series(index = series.index)
-    prev = series.iloc[0]
+    # columns in minutes for any timeframe, params compare unscaled
 
-    for idx, value in series.items():
-        if idx == series.index[0]: continue
-        slope[idx] = ((value - prev) / prev) * 100
-        prev = value
+    # raw average kept to continue later
+    emas.loc[:, 'raw_' + str(min)] = raw
+    emas.loc[:, 'ema_' + str(min)] = smoothed
 
-    return np.rad2deg(np.atan(slope))
+    # slope of average
+    slope = get_slope(smoothed, timeframe)
+    emas.loc[:, 'slope_' + str(min)] = slope
 
-def build_fractals(data, path):
+    # build trend counts, consecutive minutes of rising and falling slope
+    isLong = slope.to_numpy() > 0
+    emas.loc[:, 'long_' + str(min)] = (get_run_lengths(isLong) * timeframe).astype(float)
+    emas.loc[:, 'short_' + str(min)] = (get_run_lengths(~isLong) * timeframe).astype(float)
+
+def get_slope(series, timeframe = 1):
+
+    # percent change from previous value per minute, first undefined
+    values = series.to_numpy()
+    slope = np.full(len(values), np.nan)
+    slope[1:] = ((values[1:] - values[:-1]) / values[:-1]) * 100
+    if timeframe != 1: slope /= timeframe
+
+    return np.rad2deg(np.atan(pd.Series(slope, index = series.index)))
+
+def get_run_lengths(mask):
+
+    # count of consecutive true values ending at each position, 0 where false
+    positions = np.arange(1, len(mask) + 1)
+    resets = np.maximum.accumulate(np.where(mask, 0, positions))
+
+    return positions - resets
+
+def build_fractals(data, widths):
 
     # init container
-    fractals = pd.DataFrame(
-        data = np.nan,
-        index = data.index,
-        dtype = float,
-        columns = ['buyFractal', 'sellFractal'])
-
-    # fractal indicator
-    buyPrice = np.nan
-    sellPrice = np.nan
-
-    for i in tqdm(
-        iterable = range(len(data.index)),
+    fractals = pd.DataFrame(index = data.index)
+
+    highs = data.High.to_numpy()
+    lows = data.Low.to_numpy()
+
+    for width in tqdm(
+        iterable = widths,
         colour = yellow,
         bar_format = '        Fractals:       {percentage:3.0f}%|{bar:80}{r_bar}'):
 
-        # skip first 2 bars and last 2 bars, due to definition -2:+2
-        if 2 > i or i > len(data.index) - 3: continue
+        # column names
+        col_buy = 'buyFractal_' + str(width)
+        col_sell = 'sellFractal_' + str(width)
+
+        fractals.loc[:, col_buy] = get_fractal(highs, width, np.greater)
+        fractals.loc[:, col_sell] = get_fractal(lows, width, np.less)
+
+    return fractals
+
+def extend_fractals(data, widths, bars, path):
 
-        # update prices, if needed
-        if (data.iloc[i].High > data.iloc[i-1].High
-            and data.iloc[i].High > data.iloc[i-2].High
-            and data.iloc[i].High > data.iloc[i+1].High
-            and data.iloc[i].High > data.iloc[i+2].High):
+    # continue stored fractals over bars appended after the first bars
+    fractals = pd.DataFrame(index = data.index)
 
-            buyPrice = data.iloc[i].High
+    highs = data.High.to_numpy()
+    lows = data.Low.to_numpy()
 
-        if (data.iloc[i].Low < data.iloc[i-1].Low
-            and data.iloc[i].Low < data.iloc[i-2].Low
-            and data.iloc[i].Low < data.iloc[i+1].Low
-            and data.iloc[i].Low < data.iloc[i+2].Low):
+    for width in widths:
+        for name, prices, compare in [ ('buyFractal_', highs, np.greater), ('sellFractal_', lows, np.less) ]:
 
-            sellPrice = data.iloc[i].Low
+            # window reaches 2 * width bars back, stored price held until next fractal
+            stored = np.load(path + '/' + name + str(width) + '.npy')
+            levels = get_fractal(prices[bars - 2 * width:], width, compare)[2 * width:]
+            levels[np.isnan(levels)] = stored[-1]
 
-        # stagger 2 minutes because can not see into the future
-        fractals.iloc[i+2].buyFractal = buyPrice
-        fractals.iloc[i+2].sellFractal = sellPrice
+            fractals.loc[:, name + str(width)] = np.concatenate((stored, levels))
 
-    save(fractals, 'fractals', path)
     return fractals
 
+def get_fractal(prices, width, compare):
+
+    # centers strictly beyond all neighbors within width, skip first and last width bars
+    n = len(prices)
+    levels = np.full(n, np.nan)
+    if n <= 2 * width: return levels
+
+    center = prices[width : n - width]
+    isFractal = np.ones(len(center), dtype = bool)
+    for k in range(1, width + 1):
+        isFractal &= compare(center, prices[width - k : n - width - k])
+        isFractal &= compare(center, prices[width + k : n - width + k])
+
+    # hold last fractal price, stagger width bars because can not see into the future
+    held = pd.Series(np.where(isFractal, center, np.nan)).ffill().to_numpy()
+    levels[2 * width:] = held
+    return levels
+
 def init_plot(window, title):
 
     # window position, maximized
@@ -284,8 +494,8 @@ def save(bundle, filename, path):
 
     # create new binary
     path_filename = path + '/' + filename + '.bin'
-    filehandler = open(path_filename, 'wb')
-    pickle.dump(bundle, filehandler)
+    with open(path_filename, 'wb') as filehandler:
+        pickle.dump(bundle, filehandler)
 
 ''' deserialize '''
 def unpack(id, path):
@@ -293,8 +503,83 @@ def unpack(id, path):
     filename = str(id) + '.bin'
     path_filename = path + '/' + filename
 
-    filehandler = open(path_filename, 'rb')
-    return pickle.load(filehandler)
+    with open(path_filename, 'rb') as filehandler:
+        return pickle.load(filehandler)
+
+''' indicator column store '''
+def get_manifest(data, path):
+
+    # columns on disk with definition version, reset if written for other ohlc
+    manifest = {
+        'bars': len(data.index),
+        'start': str(data.index[0]),
+        'end': str(data.index[-1]),
+        'hash': get_fingerprint(data),
+        'timezone': str(data.index.tz),
+        'name': data.index.name,
+        'columns': { } }
+
+    try:
+        with open(path + '/manifest.json') as file:
+            stored = json.load(file)
+    except FileNotFoundError:
+        return manifest
+
+    if all(stored.get(key) == manifest[key] for key in ['bars', 'start', 'end', 'hash']):
+        manifest['columns'] = stored['columns']
+        for key in [ 'source', 'prefix' ]:
+            if key in stored: manifest[key] = stored[key]
+
+    # bars appended to stored ohlc, columns can be continued
+    elif (stored.get('start') == manifest['start']
+        and manifest['bars'] > stored.get('bars', manifest['bars'])
+        and get_fingerprint(data.iloc[:stored['bars']]) == stored.get('hash')):
+
+        manifest['prefix'] = { 'bars': stored['bars'], 'columns': stored['columns'] }
+
+    return manifest
+
+def get_fingerprint(data):
+
+    # content hash of timestamps and prices, tens of ms for months of bars
+    digest = hashlib.blake2b(digest_size = 16)
+    digest.update(data.index.as_unit('ns').asi8.tobytes())
+    for name in data.columns:
+        digest.update(name.encode())
+        digest.update(np.ascontiguousarray(data.loc[:, name].to_numpy()).tobytes())
+
+    return digest.hexdigest()
+
+def save_columns(frame, version, manifest, path):
+
+    # make directory, if needed
+    if not os.path.exists(path):
+        os.makedirs(path)
+
+    # timestamps as utc nanoseconds, drop index attached before
+    save_array(frame.index.as_unit('ns').asi8, 'index', path)
+    indexes.pop(path, None)
+
+    # one binary per column
+    for name in frame.columns:
+        save_array(frame.loc[:, name].to_numpy(), name, path)
+        manifest['columns'][name] = version
+        if 'prefix' in manifest: manifest['prefix']['columns'].pop(name, None)
+
+    # manifest last, only lists complete columns
+    save_manifest(manifest, path)
+
+def save_array(array, name, path):
+
+    # replace, frames already mapped keep reading the old file
+    filepath = path + '/' + name + '.npy'
+    with open(filepath + '.tmp', 'wb') as file:
+        np.save(file, array)
+    os.replace(filepath + '.tmp', filepath)
+
+def save_manifest(manifest, path):
+    with open(path + '/manifest.json', 'w') as file:
+        json.dump(manifest, file)
 
 def format_timestamp(idx, type = 'tradingview'):
 
@@ -28,7 +28,8 @@ params = LiveParams(
     slowAngleFactor = 15,
     coolOffMinutes = 15,
     trendStartHour = 8,
-    trendEndHour = 0
+    trendEndHour = 0,
+    fractalWidth = 2
 )
 
 ###################################################################
@@ -47,14 +48,11 @@ id = format_timestamp(datetime.now(), 'local')
 # init data
 data = getOhlc(asset, num_months, isNetwork)
 
-# get indicators
-# emas = unpack('emas', data_path)
-# fractals = unpack('fractals', data_path)
-
 # init indicators
 opt = deepcopy(params)
 opt.fastMinutes = [params.fastMinutes]
 opt.slowMinutes = [params.slowMinutes]
+opt.fractalWidth = [params.fractalWidth]
 emas, fractals = getIndicators(data, opt, data_path)
 
 # define strategy
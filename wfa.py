@@ -3,8 +3,10 @@ import time
 import warnings
 from multiprocessing import Pool
 
+from analysis.Screening import Screening
 from analysis.WalkForward import WalkForward
 from model.Fitness import Fit, Fitness
+from model.Pruning import Pruning
 from strategy.LiveParams import LiveParams
 from utils import utils
 from utils.metrics import *
@@ -21,6 +23,7 @@ isNetwork = False
 # walk forward
 percent = 25
 runs = 9 # +1 added for final in-sample
+isWarmStart = False # carry open position from in-sample into out-of-sample
 fitness = Fitness(
     fits = [
         # (Fit.PROFIT_FACTOR, 50),
@@ -30,6 +33,14 @@ fitness = Fitness(
         # (Fit.CORRELATION, 50),
     ])
 
+# screen candidates on coarse bars, re-run survivors on 1 minute bars
+isCoarseToFine = False
+screen_timeframe = 5 # minutes per coarse bar, 15 or more is faster but ranks poorly and can drop the best candidates
+
+# stop hopeless in-sample engines early, otherwise run all bars
+isPruning = False
+pruning = Pruning(max_drawdown = 3000, max_trades = 5000, min_profit = -2000, checkpoint = 1440) if isPruning else None
+
 # multiprocessing uses all cores, 16 available, leave 1 for basic tasks
 cores = runs + 1 # multiprocessing.cpu_count() - 1
 
@@ -48,6 +59,7 @@ opt = LiveParams(
     coolOffMinutes = [10], # np.linspace(0, 25, 26, dtype = int),
     trendStartHour = [10], # np.linspace(0, 12, 13, dtype = int),
     trendEndHour = [115], # np.linspace(12, 212, 201, dtype = int),
+    fractalWidth = [2], # np.linspace(2, 5, 4, dtype = int),
 )
 
 ###################################################################
@@ -63,10 +75,16 @@ data_path = 'data/' + data_name
 parent_path = 'wfa/' + data_name
 analyzer_path = parent_path + '/' + str(percent) + '_' + str(runs)
 
-# init data and indicators
+# init data and indicators, memory mapped and shared by pool workers
 data = getOhlc(asset, num_months, isNetwork)
 emas, fractals = getIndicators(data, opt, data_path)
 
+# coarse-to-fine search on timeframe pyramid, if enabled
+screening = None
+if isCoarseToFine:
+    pyramid = getPyramid(data, opt, data_path, [ screen_timeframe ])
+    screening = Screening(*pyramid[screen_timeframe], timeframe = screen_timeframe, survivors = 0.05)
+
 # remove residual analyses
 shutil.rmtree(analyzer_path, ignore_errors = True)
 
@@ -81,6 +99,9 @@ wfa = WalkForward(
     fractals = fractals,
     opt = opt,
     parent_path = parent_path,
+    pruning = pruning,
+    isWarmStart = isWarmStart,
+    screening = screening,
 )
 
 # init header metrics